@@ -0,0 +1,61 @@
+"""
+Measure the cold-start import time of bot.main.
+
+Run from the repository root (settings are read from .env as usual):
+    python benchmarks/import_time.py --runs 10
+
+Every run imports in a fresh interpreter. The script reports the median time to import
+bot.main, the median time to import the GA client library on its own (the cost that is now
+deferred to the first GA query), and whether gRPC was loaded while importing bot.main.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MEASURE = """
+import sys, time
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start, "grpc" in sys.modules)
+"""
+
+
+def measure(module: str, runs: int):
+    """
+    Import `module` in `runs` fresh interpreters.
+    :return: (list of seconds, whether gRPC was loaded in every run)
+    """
+    env = dict(os.environ)
+    # bot.middlewares imports `config.settings`, so the bot package directory is on the path as well.
+    env["PYTHONPATH"] = os.pathsep.join([ROOT, os.path.join(ROOT, "bot"), env.get("PYTHONPATH", "")])
+    timings, grpc_loaded = [], True
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", MEASURE.format(module=module)],
+            cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+        ).stdout.split()
+        timings.append(float(output[-2]))
+        grpc_loaded = grpc_loaded and output[-1] == "True"
+    return timings, grpc_loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    bot_timings, grpc_loaded = measure("bot.main", args.runs)
+    ga_timings, _ = measure("google.analytics.data", args.runs)
+
+    print(f"import bot.main:               {statistics.median(bot_timings) * 1000:8.1f} ms (median of {args.runs})")
+    print(f"import google.analytics.data:  {statistics.median(ga_timings) * 1000:8.1f} ms (deferred to first GA query)")
+    print(f"gRPC loaded by bot.main:       {'yes' if grpc_loaded else 'no'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,7 +12,46 @@ class Settings(BaseSettings):
     jira_base_url: str
     jira_email: str
     jira_api_token: str
+    jira_pool_size: int = 20  # Keep-alive connections shared by all Jira calls
+    jira_timeout: float = 30.0  # Seconds before a Jira request is abandoned
+    jira_page_size: int = 100  # Issues per search page (Jira Cloud serves at most 100)
+    jira_search_concurrency: int = 4  # Search pages fetched in parallel
+    jira_mirror_projects: str = "FA"  # Projects kept in the local issue mirror (comma-separated keys)
+    jira_sync_interval: int = 300  # Seconds between incremental mirror syncs
+    jira_sync_margin: int = 2  # Extra minutes re-fetched by each incremental sync
+    jira_full_sync_time: str = "03:00"  # Daily full sync that also drops deleted issues (HH:MM, UTC)
+    jira_webhook_secret: str = ""  # Shared secret of the Jira webhook; the endpoint is off while empty
+    jira_webhook_host: str = "0.0.0.0"
+    jira_webhook_port: int = 8080
+    jira_webhook_path: str = "/jira/webhook"
+    jira_cache_ttl: int = 60  # Seconds a live JQL result is reused
+    jira_cache_size: int = 128  # Max JQL results kept
+    jira_upload_concurrency: int = 3  # Attachments uploaded in parallel per issue
+    jira_relay_direct_limit: int = 10 * 1024 * 1024  # Bytes piped straight from Telegram to Jira; larger files are spooled
     ga_id: str
+    ga_timeout: float = 30.0  # Seconds before a GA report call is cancelled
+    ga_max_workers: int = 4  # Threads used when the async GA client is unavailable
+    ga_timezone: str = "UTC"  # Reporting timezone of the GA property
+    ga_cache_size: int = 256  # Max GA reports kept in memory
+    ga_cache_today_ttl: int = 300  # Seconds to cache reports that include today
+    ga_cache_path: str = ""  # Optional SQLite file so cached reports survive restarts
+    ga_tokens_per_day: int = 200000  # Property quota limits used by the throttle (GA4 standard property)
+    ga_tokens_per_hour: int = 40000
+    ga_max_concurrent: int = 10  # Concurrent GA requests allowed per property
+    ga_quota_reserve: float = 0.2  # Share of tokens kept free for interactive requests
+    ga_page_size: int = 10000  # Rows per page when streaming large GA reports
+    ga_store_days: int = 90  # Days of daily metrics kept in the local store
+    ga_store_refresh_days: int = 2  # Most recent days re-fetched while GA is still processing them
+    ga_backfill_interval: int = 3600  # Seconds between backfill runs
+    ga_live_min_interval: int = 30  # Realtime polling interval right after a change (seconds)
+    ga_live_max_interval: int = 300  # Realtime polling interval ceiling while nothing changes
+    ga_anomaly_window: int = 28  # Days in the rolling baseline of the anomaly detector
+    ga_anomaly_threshold: float = 4.0  # Robust z-score needed to flag a day
+    ga_anomaly_min_count: int = 5  # Ignore days where both value and baseline are below this
+    ga_digest_time: str = "07:00"  # When the daily digest is pushed (HH:MM, settings.ga_timezone)
+    ga_properties: str = ""  # Properties for /ga_compare_props as "id[:label],..." (defaults to ga_id)
+    ga_chart_workers: int = 2  # Processes rendering GA charts
+    ga_chart_cache_size: int = 512  # Uploaded chart file_ids remembered for re-sending
 
     class Config:
         env_file = ".env"
@@ -1,6 +1,7 @@
+import datetime
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 from sqlalchemy.ext.asyncio import AsyncAttrs, async_sessionmaker, create_async_engine
-from sqlalchemy import BigInteger, String, Integer
+from sqlalchemy import BigInteger, String, Integer, Date, DateTime, Text, UniqueConstraint, Index
 from bot.config.settings import settings
 
 # Database engine
@@ -32,6 +33,45 @@ class JiraUser(Base):
     email: Mapped[str] = mapped_column(String(100), nullable=True)  # User's email
     account_id: Mapped[str] = mapped_column(String(100), nullable=False)  # Jira account ID
 
+class GaDailyMetric(Base):
+    __tablename__ = 'ga_daily_metrics'
+    __table_args__ = (UniqueConstraint('property_id', 'event_name', 'date'),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    property_id: Mapped[str] = mapped_column(String(50))  # GA property ID
+    event_name: Mapped[str] = mapped_column(String(100))  # GA event name, e.g. "register"
+    date: Mapped[datetime.date] = mapped_column(Date)  # Day in the property's timezone
+    event_count: Mapped[int] = mapped_column(Integer, default=0)  # eventCount for that day
+
+
+class JiraIssue(Base):
+    __tablename__ = 'jira_issues'
+    __table_args__ = (
+        Index('ix_jira_issues_project_status', 'project_key', 'status_key'),
+        Index('ix_jira_issues_assignee_status', 'assignee_account_id', 'status_key'),
+    )
+
+    key: Mapped[str] = mapped_column(String(32), primary_key=True)  # Issue key, e.g. "FA-100"
+    project_key: Mapped[str] = mapped_column(String(32))
+    issue_type: Mapped[str] = mapped_column(String(50), nullable=True)  # "Task", "Bug", ...
+    summary: Mapped[str] = mapped_column(String(500), nullable=True)
+    status: Mapped[str] = mapped_column(String(50), nullable=True)  # Status name as shown by Jira
+    status_key: Mapped[str] = mapped_column(String(50), nullable=True)  # Upper-cased status for lookups
+    assignee_account_id: Mapped[str] = mapped_column(String(100), nullable=True)
+    assignee_name: Mapped[str] = mapped_column(String(100), nullable=True)
+    parent_key: Mapped[str] = mapped_column(String(32), nullable=True)
+    description: Mapped[str] = mapped_column(Text, nullable=True)
+    figma_link: Mapped[str] = mapped_column(String(500), nullable=True)  # customfield_10104
+    confluence_link: Mapped[str] = mapped_column(String(500), nullable=True)  # customfield_10105
+    updated: Mapped[datetime.datetime] = mapped_column(DateTime(timezone=True), nullable=True)  # Last change in Jira
+
+
+class JiraSyncState(Base):
+    __tablename__ = 'jira_sync_state'
+
+    name: Mapped[str] = mapped_column(String(50), primary_key=True)  # Sync job name
+    last_sync: Mapped[datetime.datetime] = mapped_column(DateTime(timezone=True))  # Start of the last successful run
+
 
 
 async def async_main():
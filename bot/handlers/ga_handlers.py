@@ -0,0 +1,323 @@
+import datetime
+import os
+import tempfile
+from aiogram import Router
+from aiogram.types import Message, FSInputFile
+from aiogram.filters import Command, CommandObject
+from bot.config.settings import settings
+from bot.handlers.google_analytics import PROPERTY_ID, get_daily_digest_async, export_report_csv_async
+from bot.requests.ga_registry import ReportSpec, build_request
+from bot.requests.ga_cache import report_cache
+from bot.requests.ga_digest import format_digest
+from bot.requests.telegram_text import MESSAGE_LIMIT, split_message
+from bot.requests.ga_quota import quota_tracker
+from bot.requests.ga_realtime import get_monitor, find_monitor
+from bot.requests.ga_funnel import get_funnel, format_funnel
+from bot.requests.ga_anomaly import load_metric_matrix, find_anomalies, format_anomalies
+from bot.requests.ga_store import TRACKED_EVENTS, get_trend, week_over_week, compare_periods
+from bot.requests.ga_charts import send_chart, get_referral_series
+from bot.requests.ga_properties import (configured_properties, get_chat_properties, set_chat_properties,
+                                        run_reports_for_properties, compare_table)
+
+
+router = Router()
+
+
+def format_change(result):
+    """
+    Render a compare_periods result as "baseline → current (+x%)".
+    """
+    change = f"{result['change']:+.1%}" if result["change"] is not None else "n/a"
+    return f"{result['baseline']} → {result['current']} ({change})"
+
+
+@router.message(Command("ga_daily"))
+async def ga_daily_handler(message: Message):
+    """
+    Fetch yesterday's metrics from Google Analytics without blocking other commands.
+    """
+    await message.answer("Fetching yesterday's Google Analytics data...")
+
+    # All daily reports go out in a single batchRunReports round trip.
+    try:
+        digest = await get_daily_digest_async()
+    except Exception as e:
+        await message.answer(f"Failed to fetch Google Analytics data: {e}")
+        return
+
+    for chunk in split_message(format_digest(digest)):
+        await message.answer(chunk)
+
+
+@router.message(Command("ga_cache_stats"))
+async def ga_cache_stats_handler(message: Message):
+    """
+    Show hit/miss counters of the GA report cache.
+    """
+    stats = report_cache.stats()
+    await message.answer(
+        f"GA report cache: {stats['entries']} entries, "
+        f"{stats['hits']} hits, {stats['misses']} misses "
+        f"(hit ratio {stats['hit_ratio']:.0%})"
+    )
+
+
+@router.message(Command("ga_quota"))
+async def ga_quota_handler(message: Message):
+    """
+    Show the GA property quota reported by the latest call and usage counters.
+    """
+    metrics = quota_tracker.metrics()
+    lines = [
+        "GA quota:",
+        f"- Requests: {metrics['requests']} (in flight: {metrics['in_flight']}, deferred: {metrics['deferred']})",
+        f"- Tokens consumed since start: {metrics['tokens_consumed']}",
+    ]
+    labels = configured_properties()
+    for property, snapshot in metrics["quota"].items():
+        property_id = property.split("/")[-1]
+        lines.append(f"{labels.get(property_id, property_id)}:")
+        for name, status in snapshot.items():
+            lines.append(f"- {name}: {status['remaining']} remaining ({status['consumed']} used by last call)")
+    await message.answer("\n".join(lines))
+
+
+@router.message(Command("ga_trend"))
+async def ga_trend_handler(message: Message, command: CommandObject):
+    """
+    Show the daily series of an event from the local store: /ga_trend <event> [days].
+    """
+    args = (command.args or "").split()
+    if not args or args[0] not in TRACKED_EVENTS:
+        await message.answer(f"Usage: /ga_trend <event> [days]\nEvents: {', '.join(TRACKED_EVENTS)}")
+        return
+
+    # The local store holds no more than settings.ga_store_days days.
+    days = min(int(args[1]) if len(args) > 1 and args[1].isdigit() else 30, settings.ga_store_days)
+    if days < 1:
+        await message.answer("Days must be at least 1.")
+        return
+    try:
+        series = await get_trend(args[0], days)
+    except Exception as e:
+        await message.answer(f"Failed to load trend: {e}")
+        return
+    total = sum(count for _, count in series)
+
+    response = f"{args[0]} over the last {days} days (total {total}, avg {total / days:.1f}/day):\n"
+    response += "\n".join(f"{day.isoformat()}: {count}" for day, count in series)
+    for chunk in split_message(response):
+        await message.answer(chunk)
+
+
+@router.message(Command("ga_wow"))
+async def ga_wow_handler(message: Message, command: CommandObject):
+    """
+    Week-over-week change for one or all tracked events: /ga_wow [event].
+    """
+    events = [command.args.strip()] if command.args else TRACKED_EVENTS
+    if any(event not in TRACKED_EVENTS for event in events):
+        await message.answer(f"Unknown event. Events: {', '.join(TRACKED_EVENTS)}")
+        return
+
+    lines = ["Week over week (previous 7 days → last 7 days):"]
+    try:
+        for event in events:
+            lines.append(f"- {event}: {format_change(await week_over_week(event))}")
+    except Exception as e:
+        await message.answer(f"Failed to compare weeks: {e}")
+        return
+    await message.answer("\n".join(lines))
+
+
+@router.message(Command("ga_compare"))
+async def ga_compare_handler(message: Message, command: CommandObject):
+    """
+    Compare two periods: /ga_compare <event> <start> <end> <start> <end> (dates as YYYY-MM-DD).
+    """
+    args = (command.args or "").split()
+    try:
+        if len(args) != 5 or args[0] not in TRACKED_EVENTS:
+            raise ValueError
+        dates = [datetime.date.fromisoformat(value) for value in args[1:]]
+    except ValueError:
+        await message.answer("Usage: /ga_compare <event> <start> <end> <start> <end> (dates as YYYY-MM-DD)")
+        return
+
+    try:
+        result = await compare_periods(args[0], (dates[0], dates[1]), (dates[2], dates[3]))
+    except Exception as e:
+        await message.answer(f"Failed to compare periods: {e}")
+        return
+    await message.answer(f"{args[0]}: {format_change(result)}")
+
+
+@router.message(Command("ga_export_referrals"))
+async def ga_export_referrals_handler(message: Message, command: CommandObject):
+    """
+    Export referral counts per day and ref as CSV: /ga_export_referrals [days].
+    """
+    days = int(command.args) if command.args and command.args.strip().isdigit() else 30
+    spec = ReportSpec(
+        name="Referral Export",
+        label="referral export",
+        dimensions=("date", "customEvent:ref"),
+        events=("ref",),
+        date_range=(f"{days}daysAgo", "yesterday"),
+    )
+
+    # Pages are written to a temp file as they arrive and uploaded from disk, so the export is never held in memory.
+    with tempfile.NamedTemporaryFile("w", suffix=".csv", newline="", delete=False) as file:
+        path = file.name
+        try:
+            rows = await export_report_csv_async(build_request(spec, PROPERTY_ID), file)
+        except Exception as e:
+            rows = None
+            await message.answer(f"Error exporting referrals: {e}")
+
+    try:
+        if rows is not None:
+            document = FSInputFile(path, filename=f"referrals_{days}d.csv")
+            await message.answer_document(document, caption=f"{rows} rows of referrals over the last {days} days")
+    finally:
+        os.remove(path)
+
+
+@router.message(Command("ga_live"))
+async def ga_live_handler(message: Message):
+    """
+    Post a message with realtime event counts that is edited whenever they change.
+    """
+    # All chats watching the property share one polling task.
+    try:
+        monitor = get_monitor(PROPERTY_ID, message.bot)
+        await monitor.subscribe(message.chat.id)
+    except Exception as e:
+        await message.answer(f"Failed to start GA live updates: {e}")
+
+
+@router.message(Command("ga_live_stop"))
+async def ga_live_stop_handler(message: Message):
+    """
+    Stop realtime updates in this chat.
+    """
+    monitor = find_monitor(PROPERTY_ID)
+    if monitor and monitor.unsubscribe(message.chat.id):
+        await message.answer("GA live updates stopped.")
+    else:
+        await message.answer("GA live updates are not running in this chat.")
+
+
+@router.message(Command("ga_anomalies"))
+async def ga_anomalies_handler(message: Message, command: CommandObject):
+    """
+    Scan the stored daily metrics for anomalies: /ga_anomalies [days].
+    """
+    days = int(command.args) if command.args and command.args.strip().isdigit() else 90
+    try:
+        events, dates, matrix = await load_metric_matrix(days)
+        anomalies = find_anomalies(events, dates, matrix)
+    except Exception as e:
+        await message.answer(f"Failed to scan for anomalies: {e}")
+        return
+    for chunk in split_message(format_anomalies(anomalies)):
+        await message.answer(chunk)
+
+
+@router.message(Command("ga_funnel"))
+async def ga_funnel_handler(message: Message, command: CommandObject):
+    """
+    Onboarding → register → connect_wallet → exercise_buy conversion: /ga_funnel [start end].
+    Dates use GA syntax (YYYY-MM-DD, NdaysAgo, yesterday, today).
+    """
+    args = (command.args or "").split()
+    start, end = (args[0], args[1]) if len(args) == 2 else ("7daysAgo", "yesterday")
+    try:
+        funnel = await get_funnel(start, end)
+    except Exception as e:
+        await message.answer(f"Error fetching funnel: {e}")
+        return
+    await message.answer(format_funnel(funnel, start, end))
+
+
+@router.message(Command("ga_properties"))
+async def ga_properties_handler(message: Message, command: CommandObject):
+    """
+    Show or choose the properties compared in this chat: /ga_properties [id,id,...].
+    """
+    if command.args:
+        property_ids = [value.strip() for value in command.args.replace(",", " ").split()]
+        set_chat_properties(message.chat.id, property_ids)
+    labels = configured_properties()
+    properties = ", ".join(labels.get(p, p) for p in get_chat_properties(message.chat.id))
+    await message.answer(f"GA properties for this chat: {properties}")
+
+
+@router.message(Command("ga_compare_props"))
+async def ga_compare_props_handler(message: Message, command: CommandObject):
+    """
+    Yesterday's daily reports for several properties side by side: /ga_compare_props [id,id,...].
+    Without arguments the chat's properties (see /ga_properties) are used.
+    """
+    if command.args:
+        property_ids = [value.strip() for value in command.args.replace(",", " ").split()]
+    else:
+        property_ids = get_chat_properties(message.chat.id)
+    await message.answer(f"Fetching yesterday's data for {len(property_ids)} GA properties...")
+
+    try:
+        results = await run_reports_for_properties(property_ids)
+    except Exception as e:
+        await message.answer(f"Failed to fetch GA properties: {e}")
+        return
+    table, errors = compare_table(results, labels=configured_properties())
+    for chunk in split_message(table, MESSAGE_LIMIT - 8):
+        await message.answer(f"```\n{chunk}```", parse_mode="Markdown")
+    if errors:
+        await message.answer("Errors:\n" + "\n".join(errors))
+
+
+@router.message(Command("ga_chart"))
+async def ga_chart_handler(message: Message, command: CommandObject):
+    """
+    Chart daily counts from the local store: /ga_chart <event[,event...]> [days].
+    """
+    args = (command.args or "").split()
+    events = args[0].split(",") if args else []
+    if not events or any(event not in TRACKED_EVENTS for event in events):
+        await message.answer(f"Usage: /ga_chart <event[,event...]> [days]\nEvents: {', '.join(TRACKED_EVENTS)}")
+        return
+
+    days = int(args[1]) if len(args) > 1 and args[1].isdigit() else 30
+    if days < 1:
+        await message.answer("Days must be at least 1.")
+        return
+    try:
+        series = {}
+        for event in events:
+            trend = await get_trend(event, days)
+            series[event] = [count for _, count in trend]
+        dates = [day.isoformat() for day, _ in trend]
+        await send_chart(message, "line", f"Last {days} days", dates, series)
+    except Exception as e:
+        await message.answer(f"Failed to draw chart: {e}")
+
+
+@router.message(Command("ga_chart_referrals"))
+async def ga_chart_referrals_handler(message: Message, command: CommandObject):
+    """
+    Stacked chart of referrals per day by ref: /ga_chart_referrals [days].
+    """
+    days = int(command.args) if command.args and command.args.strip().isdigit() else 30
+    try:
+        dates, series = await get_referral_series(days)
+    except Exception as e:
+        await message.answer(f"Error fetching referrals: {e}")
+        return
+    if not dates:
+        await message.answer("No referrals in this period.")
+        return
+    try:
+        await send_chart(message, "stacked", f"Referrals by ref, last {days} days", dates, series)
+    except Exception as e:
+        await message.answer(f"Failed to draw chart: {e}")
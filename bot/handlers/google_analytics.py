@@ -1,19 +1,68 @@
-from google.analytics.data import BetaAnalyticsDataClient
-from google.analytics.data_v1beta.types import RunReportRequest
-from google.oauth2 import service_account
+import asyncio
+import csv
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 
 from bot.config.settings import settings
+from bot.requests.ga_cache import report_cache
+from bot.requests.ga_quota import quota_tracker
+from bot.requests.ga_registry import ReportSpec, register_report, build_request, build_query_request, plan, fan_out
 
 
 # Replace with your Google Analytics property ID
 PROPERTY_ID = settings.ga_id
-credentials = service_account.Credentials.from_service_account_file(
-    settings.ga_credentials
-)
-analytics_client = BetaAnalyticsDataClient(credentials=credentials)
 
-print(analytics_client)
+# Credentials and clients are created on first use: importing the GA client library pulls in gRPC
+# and reading the service-account file touches disk, which importers that never query GA should not pay for.
+_credentials = None
+_client = None
+_client_lock = threading.RLock()
+# The async client binds its gRPC channel to the running loop, so it is created on first use.
+_async_client = None
+# Bounded pool used when the gRPC asyncio transport is unavailable.
+_executor = ThreadPoolExecutor(max_workers=settings.ga_max_workers, thread_name_prefix="ga")
+
+# batchRunReports accepts at most five requests per call.
+BATCH_SIZE = 5
+
+
+def get_credentials():
+    """
+    Load the GA service-account credentials once (thread-safe).
+    """
+    global _credentials
+    if _credentials is None:
+        with _client_lock:
+            if _credentials is None:
+                from google.oauth2 import service_account
+                _credentials = service_account.Credentials.from_service_account_file(settings.ga_credentials)
+    return _credentials
+
+
+def get_client():
+    """
+    Return the shared BetaAnalyticsDataClient, building it on first use (thread-safe).
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from google.analytics.data import BetaAnalyticsDataClient
+                _client = BetaAnalyticsDataClient(credentials=get_credentials())
+    return _client
+
+
+def __getattr__(name):
+    # Keeps `analytics_client` / `credentials` importable without building them at import time.
+    if name == "analytics_client":
+        return get_client()
+    if name == "credentials":
+        return get_credentials()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 def format_response(response):
     """
@@ -22,15 +71,308 @@ def format_response(response):
     if not response.rows:
         return "No data available for the selected query."
 
-    formatted_data = []
-    for row in response.rows:
-        row_data = {dimension.name: value for dimension, value in zip(response.dimension_headers, row.dimension_values)}
-        row_data.update({metric.name: value for metric, value in zip(response.metric_headers, row.metric_values)})
-        formatted_data.append(row_data)
-    
-    return formatted_data
+    from bot.requests.ga_columns import ColumnarReport
+    return ColumnarReport.from_response(response).to_records()
+
+
+def _get_async_client():
+    global _async_client
+    if _async_client is None:
+        try:
+            from google.analytics.data import BetaAnalyticsDataAsyncClient
+            _async_client = BetaAnalyticsDataAsyncClient(credentials=get_credentials())
+        except Exception as e:
+            logging.warning(f"GA async client unavailable, using thread pool instead: {e}")
+            _async_client = False
+    return _async_client or None
+
+
+def _with_quota(request):
+    # Copy of the request that asks GA to report the property quota it consumed.
+    from google.analytics.data_v1beta.types import RunReportRequest, BatchRunReportsRequest
+    if isinstance(request, BatchRunReportsRequest):
+        return BatchRunReportsRequest(
+            property=request.property,
+            requests=[RunReportRequest(report, return_property_quota=True) for report in request.requests],
+        )
+    return type(request)(request, return_property_quota=True)
+
+
+def _record_quota(method, request, response):
+    if method == "run_realtime_report":
+        return  # Realtime reports draw on a separate quota bucket
+    for report in (response.reports if method == "batch_run_reports" else [response]):
+        quota_tracker.record(request.property, report.property_quota)
+
+
+def _call(method, request, timeout=None):
+    response = getattr(get_client(), method)(_with_quota(request), timeout=timeout or settings.ga_timeout)
+    _record_quota(method, request, response)
+    return response
+
+
+async def _call_async(method, request, timeout=None, priority="interactive"):
+    timeout = timeout or settings.ga_timeout
+    request = _with_quota(request)
+    async with quota_tracker.throttle(request.property, priority):
+        client = _get_async_client()
+        if client is not None:
+            call = getattr(client, method)(request, timeout=timeout)
+        else:
+            # The worker thread cannot be interrupted, but the gRPC deadline bounds how long it stays busy.
+            call = asyncio.get_running_loop().run_in_executor(
+                _executor, functools.partial(getattr(get_client(), method), request, timeout=timeout)
+            )
+        response = await asyncio.wait_for(call, timeout)
+    _record_quota(method, request, response)
+    return response
+
+
+def run_report(request):
+    """
+    Run a GA report, serving it from the report cache when possible.
+    :param request: RunReportRequest to execute.
+    :return: RunReportResponse.
+    """
+    response = report_cache.get(request)
+    if response is None:
+        response = _call("run_report", request)
+        report_cache.set(request, response)
+    return response
+
+
+async def run_report_async(request, timeout: float = None, priority: str = "interactive", use_cache: bool = True):
+    """
+    Run a GA report without blocking the event loop.
+    :param request: RunReportRequest to execute.
+    :param timeout: Seconds to wait before the call is cancelled (defaults to settings.ga_timeout).
+    :param priority: "interactive" or "background"; background calls are throttled as quota runs low.
+    :param use_cache: Serve the report from the cache when possible; when False GA is always asked
+        (the fresh response still replaces the cached one).
+    :return: RunReportResponse.
+    """
+    response = await report_cache.get_async(request) if use_cache else None
+    if response is None:
+        response = await _call_async("run_report", request, timeout, priority)
+        await report_cache.set_async(request, response)
+    return response
+
+
+async def run_realtime_report_async(request, timeout: float = None):
+    """
+    Run a realtime report without blocking the event loop (never cached).
+    :param request: RunRealtimeReportRequest to execute.
+    :return: RunRealtimeReportResponse.
+    """
+    return await _call_async("run_realtime_report", request, timeout)
+
+
+def _chunks(items):
+    return [items[i:i + BATCH_SIZE] for i in range(0, len(items), BATCH_SIZE)]
+
+
+def _batch_request(chunk):
+    # Every request in a batch must target the batch-level property.
+    from google.analytics.data_v1beta.types import BatchRunReportsRequest
+    return BatchRunReportsRequest(property=chunk[0].property, requests=chunk)
+
+
+def batch_run_reports(requests):
+    """
+    Run several reports with as few batchRunReports calls as possible.
+    Cached reports are served locally and left out of the batch.
+    :param requests: List of RunReportRequest for the same property.
+    :return: List of RunReportResponse in the same order as the requests.
+    """
+    responses = [report_cache.get(request) for request in requests]
+    missing = [i for i, response in enumerate(responses) if response is None]
+    for chunk in _chunks(missing):
+        batch = _call("batch_run_reports", _batch_request([requests[i] for i in chunk]))
+        for i, report in zip(chunk, batch.reports):
+            report_cache.set(requests[i], report)
+            responses[i] = report
+    return responses
+
+
+async def batch_run_reports_async(requests, timeout: float = None, priority: str = "interactive"):
+    """
+    Non-blocking variant of batch_run_reports; batches beyond the first run concurrently.
+    :param requests: List of RunReportRequest for the same property.
+    :param timeout: Seconds to wait for each batch call.
+    :param priority: "interactive" or "background".
+    :return: List of RunReportResponse in the same order as the requests.
+    """
+    responses = list(await asyncio.gather(*(report_cache.get_async(request) for request in requests)))
+    chunks = _chunks([i for i, response in enumerate(responses) if response is None])
+    batches = await asyncio.gather(
+        *(_call_async("batch_run_reports", _batch_request([requests[i] for i in chunk]), timeout, priority)
+          for chunk in chunks)
+    )
+    for chunk, batch in zip(chunks, batches):
+        for i, report in zip(chunk, batch.reports):
+            await report_cache.set_async(requests[i], report)
+            responses[i] = report
+    return responses
+
+
+def _page_request(request, offset, limit):
+    # Copies the request; the caller's request is left untouched. Set the fields after copying:
+    # constructor kwargs are merged, and a zero offset would not clear one set by the caller.
+    page = type(request)(request)
+    page.offset = offset
+    page.limit = limit
+    return page
+
+
+def iter_report_pages(request, page_size: int = None):
+    """
+    Page through a report with limit/offset until row_count is reached.
+    Pages bypass the report cache so a large report is never held in memory as a whole.
+    :param request: RunReportRequest; its limit and offset are ignored.
+    :param page_size: Rows per page (defaults to settings.ga_page_size).
+    :return: Generator of RunReportResponse pages.
+    """
+    page_size = page_size or settings.ga_page_size
+    offset = 0
+    while True:
+        page = _call("run_report", _page_request(request, offset, page_size))
+        yield page
+        offset += len(page.rows)
+        if not page.rows or offset >= page.row_count:
+            return
+
+
+async def aiter_report_pages(request, page_size: int = None, prefetch: bool = True, timeout: float = None,
+                             priority: str = "interactive"):
+    """
+    Async variant of iter_report_pages.
+    :param prefetch: Request the next page while the caller is still processing the current one.
+    :param priority: "interactive" or "background".
+    :return: Async generator of RunReportResponse pages.
+    """
+    page_size = page_size or settings.ga_page_size
+    offset = 0
+    next_page = None
+    try:
+        page = await _call_async("run_report", _page_request(request, offset, page_size), timeout, priority)
+        while True:
+            offset += len(page.rows)
+            has_more = bool(page.rows) and offset < page.row_count
+            if has_more and prefetch:
+                next_page = asyncio.ensure_future(
+                    _call_async("run_report", _page_request(request, offset, page_size), timeout, priority)
+                )
+            yield page
+            if not has_more:
+                return
+            if next_page is not None:
+                page, next_page = await next_page, None
+            else:
+                page = await _call_async("run_report", _page_request(request, offset, page_size), timeout, priority)
+    finally:
+        # The consumer stopped early: drop the page fetched in advance.
+        if next_page is not None:
+            next_page.cancel()
+
+
+def iter_report_rows(request, page_size: int = None):
+    """
+    Stream a report row by row as format_response-style dicts.
+    """
+    from bot.requests.ga_columns import ColumnarReport
+    for page in iter_report_pages(request, page_size):
+        yield from ColumnarReport.from_response(page).records()
+
+
+async def aiter_report_rows(request, page_size: int = None, prefetch: bool = True, timeout: float = None):
+    """
+    Async variant of iter_report_rows.
+    """
+    from bot.requests.ga_columns import ColumnarReport
+    async for page in aiter_report_pages(request, page_size, prefetch, timeout):
+        for row in ColumnarReport.from_response(page).records():
+            yield row
+
+
+def _report_header(request):
+    return [dimension.name for dimension in request.dimensions] + [metric.name for metric in request.metrics]
+
+
+def export_report_csv(request, file, page_size: int = None):
+    """
+    Write a report to a CSV file object page by page.
+    :return: Number of data rows written.
+    """
+    writer = csv.DictWriter(file, fieldnames=_report_header(request))
+    writer.writeheader()
+    written = 0
+    for row in iter_report_rows(request, page_size):
+        writer.writerow(row)
+        written += 1
+    return written
+
+
+async def export_report_csv_async(request, file, page_size: int = None, timeout: float = None):
+    """
+    Async variant of export_report_csv.
+    """
+    writer = csv.DictWriter(file, fieldnames=_report_header(request))
+    writer.writeheader()
+    written = 0
+    async for row in aiter_report_rows(request, page_size, timeout=timeout):
+        writer.writerow(row)
+        written += 1
+    return written
+
+
+def run_reports(specs, property_id: str = PROPERTY_ID):
+    """
+    Run declared reports, fusing compatible ones into shared queries sent in batchRunReports calls.
+    :param specs: List of ReportSpec.
+    :param property_id: GA property ID.
+    :return: Dict of spec name -> RunReportResponse.
+    """
+    queries = plan(specs)
+    responses = batch_run_reports([build_query_request(query, property_id) for query in queries])
+    results = {}
+    for query, response in zip(queries, responses):
+        results.update(fan_out(query, response))
+    return results
+
+
+async def run_reports_async(specs, property_id: str = PROPERTY_ID, timeout: float = None, priority: str = "interactive"):
+    """
+    Non-blocking variant of run_reports.
+    """
+    queries = plan(specs)
+    requests = [build_query_request(query, property_id) for query in queries]
+    responses = await batch_run_reports_async(requests, timeout, priority)
+    results = {}
+    for query, response in zip(queries, responses):
+        results.update(fan_out(query, response))
+    return results
+
+
+def _fetch(spec):
+    try:
+        response = run_report(build_request(spec, PROPERTY_ID))
+        return format_response(response)
+    except Exception as e:
+        return f"Error fetching {spec.label}: {e}"
+
+
+async def _fetch_async(spec, timeout=None):
+    try:
+        response = await run_report_async(build_request(spec, PROPERTY_ID), timeout)
+        return format_response(response)
+    except asyncio.TimeoutError:
+        return f"Error fetching {spec.label}: request timed out"
+    except Exception as e:
+        return f"Error fetching {spec.label}: {e}"
+
 
 def get_analytics_data():
+    from google.analytics.data_v1beta.types import RunReportRequest
     request = RunReportRequest(
         property=f"properties/{PROPERTY_ID}",
         dimensions=[{"name": "city"}],
@@ -38,7 +380,7 @@ def get_analytics_data():
         date_ranges=[{"start_date": "7daysAgo", "end_date": "today"}],
     )
 
-    response = analytics_client.run_report(request)
+    response = run_report(request)
     data = []
 
     for row in response.rows:
@@ -49,148 +391,163 @@ def get_analytics_data():
 
     return data
 
+
+DAILY_REGISTRATIONS = register_report(ReportSpec(
+    name="Daily Registrations",
+    label="daily registrations",
+    dimensions=("date",),
+    events=("register",),
+))
+
+DAILY_REFERRALS = register_report(ReportSpec(
+    name="Daily Referrals",
+    label="referrals",
+    dimensions=("eventName", "customEvent:ref"),  # Use the correct custom dimension
+    events=("ref",),
+))
+
+ONBOARDING_DATA = register_report(ReportSpec(
+    name="Onboarding Data",
+    label="onboarding data",
+    dimensions=("eventName",),
+    events=("onboarding_complete", "onboarding_skip"),
+))
+
+WALLET_CONNECTIONS = register_report(ReportSpec(
+    name="Wallet Connections",
+    label="wallet connections",
+    dimensions=("date",),
+    events=("connect_wallet",),
+))
+
+EXERCISE_PURCHASES = register_report(ReportSpec(
+    name="Exercise Purchases",
+    label="exercise purchases",
+    dimensions=("eventName", "customEvent:alias", "customEvent:id"),
+    events=("exercise_buy",),
+))
+
+CAMERA_EVENTS = register_report(ReportSpec(
+    name="Camera Events",
+    label="camera events",
+    dimensions=("eventName",),
+    events=("camera_on", "camera_error", "camera_not_allowed"),
+))
+
+
 def get_daily_registrations():
     """
     Fetch daily registrations from Google Analytics.
     """
-    request = RunReportRequest(
-        property=f"properties/{PROPERTY_ID}",
-        date_ranges=[{"start_date": "yesterday", "end_date": "yesterday"}],
-        dimensions=[{"name": "date"}],
-        metrics=[{"name": "eventCount"}],
-        dimension_filter={"filter": {
-            "field_name": "eventName",
-            "string_filter": {"value": "register"}
-        }},
-    )
-
-    try:
-        response = analytics_client.run_report(request)
-        return format_response(response)
-    except Exception as e:
-        return f"Error fetching daily registrations: {e}"
+    return _fetch(DAILY_REGISTRATIONS)
 
 def get_daily_referrals():
     """
     Fetch daily referral counts grouped by source or referrer.
     """
-    request = RunReportRequest(
-        property=f"properties/{PROPERTY_ID}",
-        date_ranges=[{"start_date": "yesterday", "end_date": "yesterday"}],
-        dimensions=[{"name": "eventName"}, {"name": "customEvent:ref"}],  # Use the correct custom dimension
-        metrics=[{"name": "eventCount"}],
-        dimension_filter={"filter": {
-            "field_name": "eventName",
-            "string_filter": {"value": "ref"}
-        }},
-    )
-
-    try:
-        response = analytics_client.run_report(request)
-        return format_response(response)
-    except Exception as e:
-        return f"Error fetching referrals: {e}"
+    return _fetch(DAILY_REFERRALS)
 
 def get_onboarding_data():
     """
     Fetch data for onboarding completion and skips.
     """
-    request = RunReportRequest(
-        property=f"properties/{PROPERTY_ID}",
-        date_ranges=[{"start_date": "yesterday", "end_date": "yesterday"}],
-        dimensions=[{"name": "eventName"}],
-        metrics=[{"name": "eventCount"}],
-        dimension_filter={"filter": {
-            "field_name": "eventName",
-            "in_list_filter": {"values": ["onboarding_complete", "onboarding_skip"]}
-        }},
-    )
-
-    try:
-        response = analytics_client.run_report(request)
-        return format_response(response)
-    except Exception as e:
-        return f"Error fetching onboarding data: {e}"
+    return _fetch(ONBOARDING_DATA)
 
 
 def get_wallet_connections():
     """
     Fetch data for wallet connections (connect_wallet).
     """
-    request = RunReportRequest(
-        property=f"properties/{PROPERTY_ID}",
-        date_ranges=[{"start_date": "yesterday", "end_date": "yesterday"}],
-        dimensions=[{"name": "date"}],
-        metrics=[{"name": "eventCount"}],
-        dimension_filter={"filter": {
-            "field_name": "eventName",
-            "string_filter": {"value": "connect_wallet"}
-        }},
-    )
-
-    try:
-        response = analytics_client.run_report(request)
-        return format_response(response)
-    except Exception as e:
-        return f"Error fetching wallet connections: {e}"
+    return _fetch(WALLET_CONNECTIONS)
 
 def get_exercise_purchases():
     """
     Fetch data for exercise purchases (exercise_buy).
     """
-    request = RunReportRequest(
-        property=f"properties/{PROPERTY_ID}",
-        date_ranges=[{"start_date": "yesterday", "end_date": "yesterday"}],
-        dimensions=[{"name": "eventName"}, {"name": "customEvent:alias"}, {"name": "customEvent:id"}],
-        metrics=[{"name": "eventCount"}],
-        dimension_filter={"filter": {
-            "field_name": "eventName",
-            "string_filter": {"value": "exercise_buy"}
-        }},
-    )
-
-    try:
-        response = analytics_client.run_report(request)
-        return format_response(response)
-    except Exception as e:
-        return f"Error fetching exercise purchases: {e}"
+    return _fetch(EXERCISE_PURCHASES)
 
 def get_camera_events():
     """
     Fetch camera-related events (on, error, not allowed).
     """
-    request = RunReportRequest(
-        property=f"properties/{PROPERTY_ID}",
-        date_ranges=[{"start_date": "yesterday", "end_date": "yesterday"}],
-        dimensions=[{"name": "eventName"}],
-        metrics=[{"name": "eventCount"}],
-        dimension_filter={"filter": {
-            "field_name": "eventName",
-            "in_list_filter": {"values": ["camera_on", "camera_error", "camera_not_allowed"]}
-        }},
-    )
+    return _fetch(CAMERA_EVENTS)
 
+
+# Reports included in the daily digest.
+DAILY_REPORTS = [DAILY_REGISTRATIONS, DAILY_REFERRALS, ONBOARDING_DATA, WALLET_CONNECTIONS, EXERCISE_PURCHASES]
+
+
+def _format_digest(results, error=None):
+    return {
+        spec.name: f"Error fetching {spec.label}: {error}" if error else format_response(results[spec.name])
+        for spec in DAILY_REPORTS
+    }
+
+
+def get_daily_digest():
+    """
+    Fetch every daily report in a single batchRunReports round trip, with compatible reports fused.
+    :return: Dict of report title -> format_response output (or an error string).
+    """
     try:
-        response = analytics_client.run_report(request)
-        return format_response(response)
+        return _format_digest(run_reports(DAILY_REPORTS))
     except Exception as e:
-        return f"Error fetching camera events: {e}"
+        return _format_digest(None, error=e)
 
-if __name__ == "__main__":
-    print("Daily Registrations:")
-    print(get_daily_registrations())
 
-    print("Daily Referrals:")
-    print(get_daily_referrals())
+async def get_daily_digest_async(timeout: float = None, priority: str = "interactive"):
+    """
+    Non-blocking variant of get_daily_digest.
+    """
+    try:
+        return _format_digest(await run_reports_async(DAILY_REPORTS, timeout=timeout, priority=priority))
+    except asyncio.TimeoutError:
+        return _format_digest(None, error="request timed out")
+    except Exception as e:
+        return _format_digest(None, error=e)
 
-    print("Onboarding Data:")
-    print(get_onboarding_data())
 
-    print("Wallet Connections:")
-    print(get_wallet_connections())
+async def get_daily_registrations_async(timeout: float = None):
+    """
+    Non-blocking variant of get_daily_registrations.
+    """
+    return await _fetch_async(DAILY_REGISTRATIONS, timeout)
 
-    print("Exercise Purchases:")
-    print(get_exercise_purchases())
+async def get_daily_referrals_async(timeout: float = None):
+    """
+    Non-blocking variant of get_daily_referrals.
+    """
+    return await _fetch_async(DAILY_REFERRALS, timeout)
+
+async def get_onboarding_data_async(timeout: float = None):
+    """
+    Non-blocking variant of get_onboarding_data.
+    """
+    return await _fetch_async(ONBOARDING_DATA, timeout)
+
+async def get_wallet_connections_async(timeout: float = None):
+    """
+    Non-blocking variant of get_wallet_connections.
+    """
+    return await _fetch_async(WALLET_CONNECTIONS, timeout)
+
+async def get_exercise_purchases_async(timeout: float = None):
+    """
+    Non-blocking variant of get_exercise_purchases.
+    """
+    return await _fetch_async(EXERCISE_PURCHASES, timeout)
+
+async def get_camera_events_async(timeout: float = None):
+    """
+    Non-blocking variant of get_camera_events.
+    """
+    return await _fetch_async(CAMERA_EVENTS, timeout)
+
+
+if __name__ == "__main__":
+    for title, data in get_daily_digest().items():
+        print(f"{title}:")
+        print(data)
 
     # print("Camera Events:")
-    # print(get_camera_events())
\ No newline at end of file
+    # print(get_camera_events())
@@ -1,14 +1,16 @@
-import os
-from tempfile import gettempdir
 from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
 from aiogram.filters import Command
 from aiogram.utils.keyboard import InlineKeyboardBuilder, InlineKeyboardButton
 from bot.states.jira_states import TaskCreationStates, BugCreationStates, IssuesStates
+from bot.requests.jira_client import jira_client
+from bot.requests.jira_query import jql_cache
+from bot.requests.jira_relay import attachment_from_message
 from bot.requests.jira_requests import (create_issue_dict, 
-                                        sync_create_jira_task, 
-                                        add_attachment_async,
+                                        create_jira_task, 
+                                        upload_attachments,
+                                        format_upload_summary,
                                         get_user_by_tg_id,
                                         get_issues_by_account_id,
                                         format_tasks_with_links,
@@ -27,6 +29,24 @@ from bot.keyboards.jira_keyboard import (assignee_keyboard,
 router = Router()
 
 
+async def attach_files(message: Message, issue_key: str, attachments: list):
+    """
+    Upload all attachments of a new issue in parallel, keeping one status message up to date.
+    """
+    if not attachments:
+        return
+    status = await message.answer(f"Uploading {len(attachments)} attachment(s) to {issue_key}...")
+
+    async def show_progress(results):
+        try:
+            await status.edit_text(format_upload_summary(results))
+        except Exception:
+            pass  # Progress is best effort; the final summary below is what counts.
+
+    results = await upload_attachments(issue_key, attachments, message.bot, on_progress=show_progress)
+    await show_progress(results)
+
+
 @router.message(Command("jira_create_issue"))
 async def start_task_creation(message: Message, state: FSMContext):
     """Start task creation."""
@@ -41,8 +61,6 @@ async def set_task_title(message: Message, state: FSMContext):
     await message.answer("Enter the task description (you can also attach media like photos, code, or tables):")
 
 
-import os
-
 @router.message(TaskCreationStates.description)
 async def set_task_description(message: Message, state: FSMContext):
     """
@@ -58,45 +76,14 @@ async def set_task_description(message: Message, state: FSMContext):
     description = data.get("description", "")
     attachments = data.get("attachments", [])
 
-    # Check for photo attachments
-    if message.photo:
-        user_id = message.from_user.id
-        photo = message.photo[-1]  # Get the highest resolution photo
-        file_path = f"temp_photos/photo_{user_id}_{photo.file_id}.jpg"
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
-
-        try:
-            # Download the photo
-            file_info = await message.bot.get_file(photo.file_id)
-            downloaded_file = await message.bot.download_file(file_info.file_path)
-            with open(file_path, "wb") as photo_file:
-                photo_file.write(downloaded_file.getvalue())
-
-            # Append the photo to attachments
-            attachments.append(file_path)
-            description += f"\n![Photo: {os.path.basename(file_path)}](attached later)\n"
-        except Exception as e:
-            await message.reply(f"Error processing photo: {e}")
-
-    # Check for document attachments
-    elif message.document:
-        document = message.document
-        file_id = document.file_id
-        file_path = os.path.join("temp_files", document.file_name)  # Temp file path
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
-
-        try:
-            # Download the document
-            file_info = await message.bot.get_file(file_id)
-            downloaded_file = await message.bot.download_file(file_info.file_path)
-            with open(file_path, "wb") as document_file:
-                document_file.write(downloaded_file.getvalue())
-
-            # Append the document to attachments
-            attachments.append(file_path)
-            description += f"\n[Attachment: {document.file_name}](attached later)\n"
-        except Exception as e:
-            await message.reply(f"Error processing document: {e}")
+    # Photos and documents stay on Telegram until the issue is created; only their file_id is kept.
+    attachment = attachment_from_message(message)
+    if attachment:
+        attachments.append(attachment)
+        if message.photo:
+            description += f"\n![Photo: {attachment['file_name']}](attached later)\n"
+        else:
+            description += f"\n[Attachment: {attachment['file_name']}](attached later)\n"
 
     # Handle plain text
     elif message.text:
@@ -235,16 +222,10 @@ async def confirm_task_creation(message: Message, state: FSMContext):
 
     try:
         # Step 1: Create the task
-        issue = sync_create_jira_task(issue_dict)
+        issue = await create_jira_task(issue_dict)
 
         # Step 2: Attach files
-        attachments = data.get("attachments", [])
-        for file_path in attachments:
-            try:
-                await add_attachment_async(issue.key, file_path)
-                os.remove(file_path)  # Delete the file after successful upload
-            except Exception as e:
-                await message.reply(f"Failed to attach {file_path}: {e}")
+        await attach_files(message, issue.key, data.get("attachments", []))
 
         # Step 3: Respond to the user
         await message.answer(f"Task created successfully! Task key: {issue.key}")
@@ -281,8 +262,8 @@ async def my_issues_handler(message: Message):
             return
 
         # Format and send the list of tasks
-        response = format_tasks_with_links(issues, limit=10)
-        await message.answer(response, parse_mode="Markdown")
+        for chunk in format_tasks_with_links(issues, limit=10):
+            await message.answer(chunk, parse_mode="Markdown")
     except Exception as e:
         await message.answer(f"Failed to fetch your tasks: {e}")
 
@@ -322,8 +303,11 @@ async def user_issues_callback(callback: CallbackQuery, state: FSMContext):
             return
 
         # Format the tasks into a readable response
-        response = format_tasks_with_links(issues)  # Limit to the first 10 tasks
-        await callback.message.edit_text(response, parse_mode="Markdown")
+        # The first message replaces the keyboard; longer listings continue in new messages.
+        chunks = format_tasks_with_links(issues)
+        await callback.message.edit_text(next(chunks), parse_mode="Markdown")
+        for chunk in chunks:
+            await callback.message.answer(chunk, parse_mode="Markdown")
     except Exception as e:
         await callback.message.edit_text(f"Failed to fetch tasks: {e}")
     await state.clear()
@@ -343,8 +327,8 @@ async def ready_for_test_handler(message: Message):
             return
 
         # Format tasks grouped by parent issue
-        response = format_on_dev_tasks(issues)
-        await message.answer(response, parse_mode="Markdown")
+        for chunk in format_on_dev_tasks(issues):
+            await message.answer(chunk, parse_mode="Markdown")
     except Exception as e:
         await message.answer(f"Failed to fetch tasks: {e}")
         
@@ -363,8 +347,8 @@ async def current_issues_handler(message: Message):
             return
 
         # Format and display the grouped tasks
-        response = format_in_progress_issues(issues)
-        await message.answer(response, parse_mode="Markdown")
+        for chunk in format_in_progress_issues(issues):
+            await message.answer(chunk, parse_mode="Markdown")
     except Exception as e:
         await message.answer(f"Failed to fetch tasks: {e}")
 
@@ -385,16 +369,9 @@ async def start_bug_report(message: Message, state: FSMContext):
     print(f"Extracted description: {description}")  # Debugging
     attachments = []
 
-    if reply_message.photo:
-        # Save photo locally
-        photo = reply_message.photo[-1]
-        file_path = f"temp_photos/photo_{photo.file_id}.jpg"
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
-        file_info = await message.bot.get_file(photo.file_id)
-        downloaded_file = await message.bot.download_file(file_info.file_path)
-        with open(file_path, "wb") as photo_file:
-            photo_file.write(downloaded_file.getvalue())
-        attachments.append(file_path)
+    attachment = attachment_from_message(reply_message)
+    if attachment:
+        attachments.append(attachment)
 
     # Initialize bug-specific state data
     await state.set_state(BugCreationStates.title)
@@ -519,16 +496,10 @@ async def confirm_bug_report(message: Message, state: FSMContext):
 
     try:
         # Step 1: Create the bug report
-        issue = sync_create_jira_task(issue_dict)
+        issue = await create_jira_task(issue_dict)
 
         # Step 2: Attach files
-        attachments = data.get("attachments", [])
-        for file_path in attachments:
-            try:
-                await add_attachment_async(issue.key, file_path)
-                os.remove(file_path)  # Delete the file after successful upload
-            except Exception as e:
-                await message.reply(f"Failed to attach {file_path}: {e}")
+        await attach_files(message, issue.key, data.get("attachments", []))
 
         # Step 3: Respond to the user
         await message.answer(f"Bug report created successfully! Task key: {issue.key}")
@@ -558,7 +529,34 @@ async def jira_all_bugs_handler(message: Message):
             return
 
         # Format the response
-        response = format_bugs_list(bugs)
-        await message.answer(response, parse_mode="Markdown")
+        for chunk in format_bugs_list(bugs):
+            await message.answer(chunk, parse_mode="Markdown")
     except Exception as e:
-        await message.answer(f"Failed to fetch bugs: {e}")
\ No newline at end of file
+        await message.answer(f"Failed to fetch bugs: {e}")
+
+
+@router.message(Command("jira_health"))
+async def jira_health_handler(message: Message):
+    """
+    Check the connection to Jira.
+    """
+    health = await jira_client.health_check()
+    if health["ok"]:
+        await message.answer(f"Jira {health['version']} is reachable ({health['latency'] * 1000:.0f} ms, "
+                             f"{jira_client.reconnects} reconnects since start).")
+    else:
+        await message.answer(f"Jira is unreachable: {health['error']}")
+
+
+
+@router.message(Command("jira_cache_stats"))
+async def jira_cache_stats_handler(message: Message):
+    """
+    Show how often JQL queries were served from the cache or merged with an identical request.
+    """
+    stats = jql_cache.stats()
+    await message.answer(
+        f"JQL cache: {stats['entries']} entries, {stats['hits']} hits, {stats['misses']} misses, "
+        f"{stats['coalesced']} coalesced, {stats['in_flight']} in flight, "
+        f"{stats['invalidations']} invalidations (hit ratio {stats['hit_ratio']:.0%})"
+    )
@@ -1,18 +1,28 @@
 import asyncio
+import datetime
 import logging
 from bot.handlers.gmeet_handlers import router as gm_router
 from bot.handlers.jira_handlers import router as jira_router
+from bot.handlers.ga_handlers import router as ga_router
 from aiogram.filters import CommandStart, Command
 from aiogram.types import Message, CallbackQuery
 from bot.config.settings import settings
 from aiogram import Bot, Dispatcher, F
 from bot.middlewares.access_control import AccessControlMiddleware
 from bot.database.models import async_main
+from bot.requests.ga_anomaly import ingest_and_alert
+from bot.requests.ga_digest import send_daily_digest
+from bot.requests.ga_charts import shutdown_chart_pool
+from bot.requests.jira_client import jira_client
+from bot.requests.jira_mirror import sync_jira_issues
+from bot.requests.jira_webhook import start_webhook_server
+from bot.scheduler import Scheduler
 # Initialize the bot
 
 bot = Bot(token = settings.tg_bot_api_key )
 dp = Dispatcher()
 dp.message.middleware(AccessControlMiddleware())
+scheduler = Scheduler()
 
 
 @dp.message(CommandStart())
@@ -24,15 +34,39 @@ async def cmd_start(message: Message):
 async def main():
     dp.include_router(gm_router)
     dp.include_router(jira_router)
-    #await async_main()
+    dp.include_router(ga_router)
+    dp.startup.register(jira_client.start)
+    await async_main()
     #await populate_users()
+    scheduler.every(settings.ga_backfill_interval, lambda: ingest_and_alert(bot), name="ga_backfill")
+    scheduler.daily(
+        datetime.time.fromisoformat(settings.ga_digest_time),
+        lambda: send_daily_digest(bot),
+        timezone=settings.ga_timezone,
+        name="ga_daily_digest",
+    )
+    scheduler.every(settings.jira_sync_interval, sync_jira_issues, name="jira_sync")
+    scheduler.daily(
+        datetime.time.fromisoformat(settings.jira_full_sync_time),
+        lambda: sync_jira_issues(full=True),
+        name="jira_full_sync",
+    )
+    webhook_runner = None
     try:
+        scheduler.start()
+        webhook_runner = await start_webhook_server()
         await bot.delete_webhook(drop_pending_updates=True)
         await dp.start_polling(bot, allowed_updates=dp.resolve_used_update_types())
         print("Bot is running... Press Ctrl+C to stop.")
     except Exception as e:
         logging.error(f"Bot encountered an error: {e}")
     finally:
+        await scheduler.stop()
+        shutdown_chart_pool()
+        if webhook_runner:
+            await webhook_runner.cleanup()
+        # Closed only once the jobs are stopped: a Jira sync still running would re-open the session.
+        await jira_client.close()
         await bot.session.close()
 
 
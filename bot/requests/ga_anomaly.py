@@ -0,0 +1,165 @@
+import datetime
+import logging
+from sqlalchemy import select
+from bot.config.settings import settings
+from bot.database.models import GaDailyMetric, async_session
+from bot.handlers.google_analytics import PROPERTY_ID
+from bot.requests.ga_store import TRACKED_EVENTS, property_today, backfill_daily_metrics
+from bot.requests.ga_digest import digest_chats
+from bot.requests.telegram_text import split_message
+
+
+# (event, date) pairs already alerted on, so a re-run after the next ingest stays quiet.
+_alerted = set()
+
+
+async def load_metric_matrix(days: int, property_id: str = PROPERTY_ID, events: list = None):
+    """
+    Load stored daily counts as an events x days matrix with a single query.
+    :return: (events, dates, matrix) where matrix[i, j] is the count of events[i] on dates[j].
+    """
+    events = events or TRACKED_EVENTS
+    end = property_today() - datetime.timedelta(days=1)
+    start = end - datetime.timedelta(days=days - 1)
+    dates = [start + datetime.timedelta(days=i) for i in range(days)]
+
+    async with async_session() as session:
+        result = await session.execute(
+            select(GaDailyMetric.event_name, GaDailyMetric.date, GaDailyMetric.event_count).where(
+                GaDailyMetric.property_id == property_id,
+                GaDailyMetric.event_name.in_(events),
+                GaDailyMetric.date.between(start, end),
+            )
+        )
+        rows = result.all()
+
+    # numpy is imported on first use, so loading the bot does not pay for it.
+    import numpy as np
+    matrix = np.zeros((len(events), days), dtype=np.float64)
+    if rows:
+        event_index = {event: i for i, event in enumerate(events)}
+        names, row_dates, counts = zip(*rows)
+        matrix[
+            np.fromiter((event_index[name] for name in names), dtype=np.int64, count=len(rows)),
+            np.fromiter(((day - start).days for day in row_dates), dtype=np.int64, count=len(rows)),
+        ] = counts
+    return events, dates, matrix
+
+
+def robust_scores(matrix, window: int):
+    """
+    Score every day against the median/MAD of the preceding `window` days, for all series at once.
+    :return: (scores, baselines) shaped like matrix[:, window:].
+    """
+    import numpy as np
+    from numpy.lib.stride_tricks import sliding_window_view
+    history = sliding_window_view(matrix[:, :-1], window, axis=1)  # (events, days - window, window)
+    median = np.median(history, axis=2)
+    mad = np.median(np.abs(history - median[..., None]), axis=2)
+    # Flat or sparse series have a MAD of 0; fall back to Poisson noise so a single extra event is not an alert.
+    scale = np.maximum(1.4826 * mad, np.sqrt(np.maximum(median, 1.0)))
+    return (matrix[:, window:] - median) / scale, median
+
+
+def ewma_scores(matrix, alpha: float = 0.3, warmup: int = 7):
+    """
+    Score every day against an exponentially weighted mean and variance of the days before it.
+    The recursion runs over days; each step is vectorized across all series.
+    :return: (scores, baselines) shaped like matrix[:, warmup:].
+    """
+    import numpy as np
+    mean = matrix[:, :warmup].mean(axis=1)
+    var = matrix[:, :warmup].var(axis=1)
+    scores = np.empty((matrix.shape[0], matrix.shape[1] - warmup))
+    baselines = np.empty_like(scores)
+    for j in range(warmup, matrix.shape[1]):
+        value = matrix[:, j]
+        baselines[:, j - warmup] = mean
+        scores[:, j - warmup] = (value - mean) / np.sqrt(np.maximum(var, np.maximum(mean, 1.0)))
+        diff = value - mean
+        mean = mean + alpha * diff
+        var = (1 - alpha) * (var + alpha * diff * diff)
+    return scores, baselines
+
+
+def find_anomalies(events, dates, matrix, method: str = "mad", window: int = None, threshold: float = None,
+                   min_count: int = None, last_days: int = None):
+    """
+    Flag days whose counts deviate significantly from their rolling baseline.
+    :param method: "mad" (rolling median/MAD) or "ewma".
+    :param window: Baseline length in days (warm-up length for EWMA).
+    :param threshold: Absolute score needed to flag a day.
+    :param min_count: Ignore days where both the value and the baseline are below this.
+    :param last_days: Only report anomalies within the most recent N days.
+    :return: List of dicts (event, date, value, baseline, score), largest deviation first.
+    """
+    import numpy as np
+    window = window or settings.ga_anomaly_window
+    threshold = threshold or settings.ga_anomaly_threshold
+    min_count = settings.ga_anomaly_min_count if min_count is None else min_count
+    if matrix.shape[1] <= window:
+        return []
+
+    scores, baselines = robust_scores(matrix, window) if method == "mad" else ewma_scores(matrix, warmup=window)
+    values = matrix[:, window:]
+    flagged = (np.abs(scores) >= threshold) & (np.maximum(values, baselines) >= min_count)
+    if last_days:
+        flagged[:, :-last_days] = False
+
+    anomalies = []
+    for i, j in zip(*np.nonzero(flagged)):
+        anomalies.append({
+            "event": events[i],
+            "date": dates[window + j],
+            "value": int(values[i, j]),
+            "baseline": float(baselines[i, j]),
+            "score": float(scores[i, j]),
+        })
+    return sorted(anomalies, key=lambda anomaly: -abs(anomaly["score"]))
+
+
+def format_anomalies(anomalies):
+    """
+    Render anomalies as alert text.
+    """
+    if not anomalies:
+        return "No anomalies found."
+    lines = ["GA anomalies:"]
+    for anomaly in anomalies:
+        direction = "spike" if anomaly["score"] > 0 else "drop"
+        lines.append(
+            f"- {anomaly['date'].isoformat()} {anomaly['event']}: {anomaly['value']} "
+            f"vs baseline {anomaly['baseline']:.0f} ({direction}, score {anomaly['score']:+.1f})"
+        )
+    return "\n".join(lines)
+
+
+async def ingest_and_alert(bot):
+    """
+    Backfill the daily-metrics store, then alert allowed chats about anomalies on the newest final days.
+    The last settings.ga_store_refresh_days days are left out: GA is still processing them, and their
+    partial counts would look like drops that are alerted once and never corrected.
+    :return: Number of new anomalies alerted.
+    """
+    await backfill_daily_metrics()
+    refresh = settings.ga_store_refresh_days
+    events, dates, matrix = await load_metric_matrix(settings.ga_anomaly_window + 2 * refresh + 1)
+    if refresh:
+        dates, matrix = dates[:-refresh], matrix[:, :-refresh]
+    # Days become final one by one, so the newest `refresh` final days also cover runs the bot missed.
+    anomalies = [
+        anomaly for anomaly in find_anomalies(events, dates, matrix, last_days=max(refresh, 1))
+        if (anomaly["event"], anomaly["date"]) not in _alerted
+    ]
+    if not anomalies:
+        return 0
+
+    text = format_anomalies(anomalies)
+    for chat_id in digest_chats():
+        try:
+            for chunk in split_message(text):
+                await bot.send_message(chat_id, chunk)
+        except Exception as e:
+            logging.error(f"Failed to send GA anomaly alert to {chat_id}: {e}")
+    _alerted.update((anomaly["event"], anomaly["date"]) for anomaly in anomalies)
+    return len(anomalies)
@@ -0,0 +1,193 @@
+import asyncio
+import datetime
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from zoneinfo import ZoneInfo
+from bot.config.settings import settings
+
+
+_DAYS_AGO = re.compile(r"^(\d+)daysAgo$")
+
+
+def resolve_date(value: str, today: datetime.date):
+    """
+    Resolve a GA date string ("today", "yesterday", "NdaysAgo" or YYYY-MM-DD) to a date.
+    :param value: Date string as used in a DateRange.
+    :param today: Current date in the property's timezone.
+    :return: datetime.date.
+    """
+    if value == "today":
+        return today
+    if value == "yesterday":
+        return today - datetime.timedelta(days=1)
+    match = _DAYS_AGO.match(value)
+    if match:
+        return today - datetime.timedelta(days=int(match.group(1)))
+    return datetime.date.fromisoformat(value)
+
+
+class ReportCache:
+    """
+    LRU cache of GA report responses keyed on the canonical serialized request.
+
+    Reports over closed date ranges cannot change any more, so they are kept until the
+    property's next midnight (when relative dates such as "yesterday" shift). Reports
+    that include today expire after a short TTL. An optional SQLite file keeps entries
+    across bot restarts; the async methods run its queries in a worker thread.
+    """
+
+    def __init__(self, max_entries: int = 256, today_ttl: int = 300, timezone: str = "UTC", path: str = None):
+        self.max_entries = max_entries
+        self.today_ttl = today_ttl
+        self.timezone = ZoneInfo(timezone)
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (expires_at, response)
+        self._lock = threading.Lock()  # Guards _entries; never held during disk I/O
+        self._db_lock = threading.Lock()
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS ga_report_cache (key TEXT PRIMARY KEY, expires_at REAL, payload BLOB)"
+            )
+            self._db.execute("DELETE FROM ga_report_cache WHERE expires_at < ?", (time.time(),))
+            self._db.commit()
+
+    @staticmethod
+    def make_key(request):
+        return type(request).to_json(request, sort_keys=True, indent=None)
+
+    def expires_at(self, request):
+        """
+        Compute when a cached response for this request stops being valid.
+        """
+        now = datetime.datetime.now(self.timezone)
+        today = now.date()
+        try:
+            is_open = any(resolve_date(r.end_date, today) >= today for r in request.date_ranges)
+        except ValueError:
+            is_open = True  # Unknown date format: treat it like a live report
+
+        if is_open:
+            return time.time() + self.today_ttl
+        midnight = datetime.datetime.combine(today + datetime.timedelta(days=1), datetime.time(), self.timezone)
+        return midnight.timestamp()
+
+    def get(self, request):
+        """
+        Return the cached response for a request, or None on a miss.
+        """
+        key = self.make_key(request)
+        response = self._get_memory(key)
+        if response is None and self._db is not None:
+            response = self._get_disk(key)
+        self._count(response)
+        return response
+
+    async def get_async(self, request):
+        """
+        Non-blocking variant of get: memory hits return at once, the SQLite lookup runs in a thread.
+        """
+        key = self.make_key(request)
+        response = self._get_memory(key)
+        if response is None and self._db is not None:
+            response = await asyncio.to_thread(self._get_disk, key)
+        self._count(response)
+        return response
+
+    def set(self, request, response):
+        """
+        Cache a response until its date-boundary expiry.
+        """
+        key = self.make_key(request)
+        expires_at = self.expires_at(request)
+        self._set_memory(key, expires_at, response)
+        if self._db is not None:
+            self._set_disk(key, expires_at, response)
+
+    async def set_async(self, request, response):
+        """
+        Non-blocking variant of set: the response is usable at once, the SQLite write runs in a thread.
+        """
+        key = self.make_key(request)
+        expires_at = self.expires_at(request)
+        self._set_memory(key, expires_at, response)
+        if self._db is not None:
+            await asyncio.to_thread(self._set_disk, key, expires_at, response)
+
+    def _get_memory(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.time():
+                self._entries.move_to_end(key)
+                return entry[1]
+            if entry:
+                del self._entries[key]
+            return None
+
+    def _get_disk(self, key):
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT expires_at, payload FROM ga_report_cache WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        if not row:
+            return None
+        from google.analytics.data_v1beta.types import RunReportResponse
+        response = RunReportResponse.deserialize(row[1])
+        self._set_memory(key, row[0], response)
+        return response
+
+    def _count(self, response):
+        with self._lock:
+            if response is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+    def _set_memory(self, key, expires_at, response):
+        with self._lock:
+            self._entries[key] = (expires_at, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _set_disk(self, key, expires_at, response):
+        payload = type(response).serialize(response)
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO ga_report_cache (key, expires_at, payload) VALUES (?, ?, ?)",
+                (key, expires_at, payload),
+            )
+            self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM ga_report_cache")
+                self._db.commit()
+
+    def stats(self):
+        """
+        :return: Dict with entry count, hits, misses and hit ratio.
+        """
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
+
+
+report_cache = ReportCache(
+    max_entries=settings.ga_cache_size,
+    today_ttl=settings.ga_cache_today_ttl,
+    timezone=settings.ga_timezone,
+    path=settings.ga_cache_path or None,
+)
@@ -0,0 +1,154 @@
+import asyncio
+import hashlib
+import io
+import json
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from aiogram.types import BufferedInputFile
+from bot.config.settings import settings
+from bot.handlers.google_analytics import PROPERTY_ID, run_report_async
+from bot.requests.ga_registry import ReportSpec, build_request
+
+
+# Chart hash -> Telegram file_id of the uploaded PNG
+_file_ids = {}
+# Chart hash -> task rendering it, so concurrent requests for one chart render once
+_rendering = {}
+_pool = None
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        # Forking the bot would copy its event loop, sockets and threads into the workers, so
+        # they start from a clean interpreter instead.
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        _pool = ProcessPoolExecutor(max_workers=settings.ga_chart_workers, mp_context=multiprocessing.get_context(method))
+    return _pool
+
+
+async def _render_in_pool(kind: str, title: str, dates: list, series: dict):
+    global _pool
+    pool = _get_pool()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(pool, render_chart, kind, title, dates, series)
+    except BrokenProcessPool:
+        # A worker died; drop the pool so the next chart starts a fresh one.
+        logging.error("Chart worker pool broke, restarting it")
+        if _pool is pool:
+            _pool = None
+        raise
+
+
+def shutdown_chart_pool():
+    """
+    Stop the rendering workers (called on bot shutdown).
+    """
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def render_chart(kind: str, title: str, dates: list, series: dict):
+    """
+    Render a chart to PNG. Runs in a worker process, so it only takes and returns plain data.
+    :param kind: "line" for one line per series, "stacked" for stacked areas.
+    :param dates: X axis labels (ISO dates).
+    :param series: Dict of series name -> list of values aligned with dates.
+    :return: PNG bytes.
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(10, 5), dpi=100)
+    try:
+        x = range(len(dates))
+        if kind == "stacked":
+            ax.stackplot(x, *series.values(), labels=list(series))
+        else:
+            for name, values in series.items():
+                ax.plot(x, values, marker="o", markersize=3, label=name)
+        step = max(len(dates) // 10, 1)
+        ax.set_xticks(list(x)[::step], dates[::step], rotation=45, ha="right")
+        ax.set_title(title)
+        ax.grid(alpha=0.3)
+        if series:
+            ax.legend(loc="upper left", fontsize="small")
+        fig.tight_layout()
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="png")
+        return buffer.getvalue()
+    finally:
+        plt.close(fig)
+
+
+def chart_key(kind: str, title: str, dates: list, series: dict):
+    """
+    Hash of everything that affects the rendered image.
+    """
+    payload = json.dumps([kind, title, dates, series], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+async def send_chart(message, kind: str, title: str, dates: list, series: dict, caption: str = None):
+    """
+    Reply with a chart, re-using the file_id of an identical chart sent before.
+    """
+    key = chart_key(kind, title, dates, series)
+    file_id = _file_ids.get(key)
+    if file_id:
+        await message.answer_photo(file_id, caption=caption)
+        return
+
+    task = _rendering.get(key)
+    if task is None:
+        task = _rendering[key] = asyncio.ensure_future(_render_in_pool(kind, title, dates, series))
+        task.add_done_callback(lambda _: _rendering.pop(key, None))
+    png = await asyncio.shield(task)
+
+    # Another request may have uploaded the same chart while this one was rendering.
+    file_id = _file_ids.get(key)
+    if file_id:
+        await message.answer_photo(file_id, caption=caption)
+        return
+    sent = await message.answer_photo(BufferedInputFile(png, filename="chart.png"), caption=caption)
+    if len(_file_ids) >= settings.ga_chart_cache_size:
+        del _file_ids[next(iter(_file_ids))]
+    _file_ids[key] = sent.photo[-1].file_id
+
+
+async def get_referral_series(days: int = 30, top: int = 8, property_id: str = PROPERTY_ID):
+    """
+    Daily referral counts per ref, for a stacked chart.
+    Refs outside the `top` largest are summed into "other".
+    :return: (dates, series) with dates as ISO strings and series as ref -> list of counts.
+    """
+    from bot.requests.ga_columns import ColumnarReport
+    spec = ReportSpec(
+        name="Referral Chart",
+        label="referral chart",
+        dimensions=("date", "customEvent:ref"),
+        events=("ref",),
+        date_range=(f"{days}daysAgo", "yesterday"),
+    )
+    report = ColumnarReport.from_response(await run_report_async(build_request(spec, property_id)))
+    if not len(report):
+        return [], {}
+
+    top_refs = report.top_n("eventCount", top, by="customEvent:ref").dimensions["customEvent:ref"].values()
+    grouped = report.group_by("date", "customEvent:ref")
+    raw_dates = sorted(set(grouped.dimensions["date"].values()))
+    date_index = {day: i for i, day in enumerate(raw_dates)}
+
+    series = {ref: [0] * len(raw_dates) for ref in top_refs}
+    for day, ref, count in zip(grouped.dimensions["date"].values(),
+                               grouped.dimensions["customEvent:ref"].values(),
+                               grouped.metrics["eventCount"].tolist()):
+        name = ref if ref in series else "other"
+        series.setdefault(name, [0] * len(raw_dates))[date_index[day]] += count
+    dates = [f"{day[:4]}-{day[4:6]}-{day[6:]}" for day in raw_dates]
+    return dates, series
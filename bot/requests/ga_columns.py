@@ -0,0 +1,151 @@
+import numpy as np
+
+
+def _encode(values):
+    """
+    Dictionary-encode a list of strings.
+    :return: (categories, codes) where categories[codes[i]] == values[i].
+    """
+    index = {}
+    codes = np.fromiter((index.setdefault(value, len(index)) for value in values), dtype=np.int32, count=len(values))
+    return list(index), codes
+
+
+class DimensionColumn:
+    """
+    A dimension stored once per distinct value plus an int32 code per row.
+    """
+    __slots__ = ("categories", "codes")
+
+    def __init__(self, categories, codes):
+        self.categories = categories
+        self.codes = codes
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, i):
+        return self.categories[self.codes[i]]
+
+    def take(self, indexes):
+        return DimensionColumn(self.categories, self.codes[indexes])
+
+    def values(self):
+        categories = self.categories
+        return [categories[code] for code in self.codes.tolist()]
+
+
+class ColumnarReport:
+    """
+    GA report held column by column: one encoded column per dimension and a typed numpy array per metric.
+
+    Header names are stored once instead of in every row, and metrics are parsed to numbers a
+    single time, so sums, group-bys and top-N run as array operations. to_records() gives the
+    row-dict list produced by format_response.
+    """
+    __slots__ = ("dimension_names", "metric_names", "dimensions", "metrics")
+
+    def __init__(self, dimensions: dict, metrics: dict):
+        self.dimension_names = list(dimensions)
+        self.metric_names = list(metrics)
+        self.dimensions = dimensions
+        self.metrics = metrics
+
+    @classmethod
+    def from_response(cls, response):
+        """
+        Build a columnar report from a RunReportResponse in one pass over the rows.
+        """
+        dimension_names = [header.name for header in response.dimension_headers]
+        metric_headers = list(response.metric_headers)
+        dimension_values = [[] for _ in dimension_names]
+        metric_values = [[] for _ in metric_headers]
+
+        for row in response.rows:
+            for column, value in zip(dimension_values, row.dimension_values):
+                column.append(value.value)
+            for column, value in zip(metric_values, row.metric_values):
+                column.append(value.value)
+
+        dimensions = {name: DimensionColumn(*_encode(values)) for name, values in zip(dimension_names, dimension_values)}
+        metrics = {}
+        for header, values in zip(metric_headers, metric_values):
+            dtype = np.int64 if getattr(header.type_, "name", "") == "TYPE_INTEGER" else np.float64
+            metrics[header.name] = np.asarray(values, dtype=dtype)
+        return cls(dimensions, metrics)
+
+    def __len__(self):
+        if self.metrics:
+            return len(next(iter(self.metrics.values())))
+        if self.dimensions:
+            return len(next(iter(self.dimensions.values())))
+        return 0
+
+    def sum(self, metric: str):
+        """
+        Total of a metric over all rows.
+        """
+        return self.metrics[metric].sum().item()
+
+    def take(self, indexes):
+        """
+        New report with only the given row indexes, in that order.
+        """
+        return ColumnarReport(
+            {name: column.take(indexes) for name, column in self.dimensions.items()},
+            {name: values[indexes] for name, values in self.metrics.items()},
+        )
+
+    def group_by(self, *dimensions: str):
+        """
+        Sum every metric per distinct combination of the given dimensions.
+        :return: New ColumnarReport with one row per group.
+        """
+        columns = [self.dimensions[name] for name in dimensions]
+        if len(self) == 0:
+            empty = np.arange(0)
+            return ColumnarReport(
+                {name: column.take(empty) for name, column in zip(dimensions, columns)},
+                {name: values[empty] for name, values in self.metrics.items()},
+            )
+
+        sizes = [max(len(column.categories), 1) for column in columns]
+        keys = np.ravel_multi_index([column.codes for column in columns], sizes) if columns else np.zeros(len(self), dtype=np.int64)
+        unique_keys, first_rows, inverse = np.unique(keys, return_index=True, return_inverse=True)
+
+        metrics = {}
+        for name, values in self.metrics.items():
+            totals = np.zeros(len(unique_keys), dtype=values.dtype)
+            np.add.at(totals, inverse, values)
+            metrics[name] = totals
+        return ColumnarReport({name: self.dimensions[name].take(first_rows) for name in dimensions}, metrics)
+
+    def top_n(self, metric: str, n: int = 10, by: str = None):
+        """
+        Rows with the largest values of a metric, optionally after grouping by one dimension.
+        :return: New ColumnarReport with at most n rows, largest first.
+        """
+        report = self.group_by(by) if by else self
+        values = report.metrics[metric]
+        if n < len(values):
+            indexes = np.argpartition(-values, n)[:n]
+            indexes = indexes[np.argsort(-values[indexes], kind="stable")]
+        else:
+            indexes = np.argsort(-values, kind="stable")
+        return report.take(indexes)
+
+    def records(self):
+        """
+        Lazily yield rows as {header name: value} dicts.
+        """
+        names = self.dimension_names + self.metric_names
+        columns = [column.values() for column in self.dimensions.values()]
+        columns += [values.tolist() for values in self.metrics.values()]
+        for row in zip(*columns):
+            yield dict(zip(names, row))
+
+    def to_records(self):
+        """
+        :return: List of row dicts, the shape format_response has always returned.
+        """
+        return list(self.records())
@@ -0,0 +1,58 @@
+import asyncio
+import logging
+from bot.config.settings import settings
+from bot.handlers.google_analytics import get_daily_digest_async
+from bot.requests.telegram_text import split_message
+
+
+def format_report_section(title, data):
+    """
+    Render one report returned by the GA fetchers as a text block.
+    :param title: Section heading.
+    :param data: List of row dicts, or an error / "no data" string.
+    :return: Formatted string.
+    """
+    if isinstance(data, str):
+        return f"{title}:\n{data}\n"
+
+    lines = [f"{title}:"]
+    for row in data:
+        values = [f"{name}: {value}" for name, value in row.items()]
+        lines.append("- " + ", ".join(values))
+    return "\n".join(lines) + "\n"
+
+
+def format_digest(digest):
+    """
+    Render a get_daily_digest result as one text.
+    """
+    return "\n".join(format_report_section(title, data) for title, data in digest.items())
+
+
+def digest_chats():
+    """
+    :return: Chat IDs from settings.allowed_chats.
+    """
+    return [chat.strip() for chat in settings.allowed_chats.split(",") if chat.strip()]
+
+
+async def send_daily_digest(bot):
+    """
+    Compute yesterday's digest once and push it to every allowed chat.
+    The responses stay in the report cache until midnight, so /ga_daily later in the day is served locally.
+    :return: Number of chats the digest was delivered to.
+    """
+    digest = await get_daily_digest_async(priority="background")
+    chunks = split_message("Daily Google Analytics digest\n\n" + format_digest(digest))
+
+    async def deliver(chat_id):
+        try:
+            for chunk in chunks:
+                await bot.send_message(chat_id, chunk)
+            return True
+        except Exception as e:
+            logging.error(f"Failed to send GA digest to {chat_id}: {e}")
+            return False
+
+    delivered = await asyncio.gather(*(deliver(chat_id) for chat_id in digest_chats()))
+    return sum(delivered)
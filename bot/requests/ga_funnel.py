@@ -0,0 +1,87 @@
+import time
+from bot.handlers.google_analytics import PROPERTY_ID, run_report_async
+from bot.requests.ga_cache import report_cache
+from bot.requests.ga_registry import ReportSpec, build_request
+
+
+FUNNEL_STEPS = ["onboarding_complete", "register", "connect_wallet", "exercise_buy"]
+
+# (property_id, start, end) -> (expires_at, funnel)
+_funnels = {}
+
+
+def funnel_spec(start: str, end: str):
+    """
+    One query for every funnel step: users and events per eventName.
+    """
+    return ReportSpec(
+        name="Funnel",
+        label="funnel",
+        dimensions=("eventName",),
+        metrics=("totalUsers", "eventCount"),
+        events=tuple(FUNNEL_STEPS),
+        date_range=(start, end),
+    )
+
+
+def compute_funnel(rows):
+    """
+    Step-to-step and overall conversion from per-event totals.
+    :param rows: Dict of event name -> {"totalUsers": int, "eventCount": int}.
+    :return: List of dicts (step, users, events, step_conversion, overall_conversion).
+    """
+    steps = []
+    first_users = rows.get(FUNNEL_STEPS[0], {}).get("totalUsers", 0)
+    previous_users = None
+    for step in FUNNEL_STEPS:
+        users = rows.get(step, {}).get("totalUsers", 0)
+        steps.append({
+            "step": step,
+            "users": users,
+            "events": rows.get(step, {}).get("eventCount", 0),
+            "step_conversion": users / previous_users if previous_users else None,
+            "overall_conversion": users / first_users if first_users else None,
+        })
+        previous_users = users
+    return steps
+
+
+async def get_funnel(start: str = "7daysAgo", end: str = "yesterday", property_id: str = PROPERTY_ID):
+    """
+    Funnel over a date range, cached like the report it is computed from.
+    Conversion compares users who fired each step event in the range; it is not sequence-aware.
+    :param start: GA start date.
+    :param end: GA end date.
+    :return: compute_funnel result.
+    """
+    key = (property_id, start, end)
+    cached = _funnels.get(key)
+    if cached and cached[0] > time.time():
+        return cached[1]
+
+    request = build_request(funnel_spec(start, end), property_id)
+    response = await run_report_async(request)
+    metric_names = [header.name for header in response.metric_headers]
+    rows = {
+        row.dimension_values[0].value: {name: int(value.value) for name, value in zip(metric_names, row.metric_values)}
+        for row in response.rows
+    }
+    funnel = compute_funnel(rows)
+    now = time.time()
+    for stale in [k for k, (expires_at, _) in _funnels.items() if expires_at <= now]:
+        del _funnels[stale]
+    _funnels[key] = (report_cache.expires_at(request), funnel)
+    return funnel
+
+
+def format_funnel(funnel, start: str, end: str):
+    """
+    Render a funnel as text.
+    """
+    lines = [f"Funnel {start} → {end} (users):"]
+    for step in funnel:
+        step_conversion = f"{step['step_conversion']:.1%}" if step["step_conversion"] is not None else "—"
+        overall = f"{step['overall_conversion']:.1%}" if step["overall_conversion"] is not None else "—"
+        lines.append(f"- {step['step']}: {step['users']} users, {step['events']} events "
+                     f"(from previous step {step_conversion}, overall {overall})")
+    return "\n".join(lines)
@@ -0,0 +1,88 @@
+import asyncio
+from bot.config.settings import settings
+from bot.handlers.google_analytics import PROPERTY_ID, DAILY_REPORTS, run_reports_async
+
+
+# chat_id -> list of property IDs chosen with /ga_properties
+_chat_properties = {}
+
+
+def configured_properties():
+    """
+    Properties from settings.ga_properties ("id[:label],..."), falling back to settings.ga_id.
+    :return: Dict of property ID -> label.
+    """
+    properties = {}
+    for entry in settings.ga_properties.split(","):
+        if entry.strip():
+            property_id, _, label = entry.strip().partition(":")
+            properties[property_id] = label or property_id
+    return properties or {PROPERTY_ID: PROPERTY_ID}
+
+
+def set_chat_properties(chat_id: int, property_ids: list):
+    _chat_properties[chat_id] = property_ids
+
+
+def get_chat_properties(chat_id: int):
+    """
+    Properties used for a chat: its own selection or every configured property.
+    """
+    return _chat_properties.get(chat_id) or list(configured_properties())
+
+
+async def run_reports_for_properties(property_ids: list, specs=None, timeout: float = None):
+    """
+    Run the same reports for several properties concurrently.
+    Every call goes through the GA throttle, which caps concurrent requests per property.
+    :return: Dict of property ID -> (dict of spec name -> RunReportResponse, or the exception raised).
+    """
+    specs = specs or DAILY_REPORTS
+    results = await asyncio.gather(
+        *(run_reports_async(specs, property_id, timeout) for property_id in property_ids),
+        return_exceptions=True,
+    )
+    return dict(zip(property_ids, results))
+
+
+def _report_totals(spec, response):
+    """
+    eventCount total of a report, plus one line per event for multi-event reports.
+    """
+    from bot.requests.ga_columns import ColumnarReport
+    report = ColumnarReport.from_response(response)
+    totals = {spec.name: report.sum("eventCount") if len(report) else 0}
+    if len(spec.events) > 1 and "eventName" in report.dimensions:
+        grouped = report.group_by("eventName")
+        counts = dict(zip(grouped.dimensions["eventName"].values(), grouped.metrics["eventCount"].tolist()))
+        for event in spec.events:
+            totals[f"  {event}"] = counts.get(event, 0)
+    return totals
+
+
+def compare_table(results, specs=None, labels: dict = None):
+    """
+    Merge per-property results into one comparative text table.
+    :param results: run_reports_for_properties output.
+    :param labels: Optional property ID -> column label.
+    """
+    specs = specs or DAILY_REPORTS
+    labels = labels or {}
+    columns = {}
+    for property_id, result in results.items():
+        column = {}
+        for spec in specs:
+            if isinstance(result, Exception):
+                column[spec.name] = "error"
+            else:
+                column.update(_report_totals(spec, result[spec.name]))
+        columns[labels.get(property_id, property_id)] = column
+
+    row_names = list(dict.fromkeys(name for column in columns.values() for name in column))
+    header = ["Report"] + list(columns)
+    rows = [[name] + [str(column.get(name, "")) for column in columns.values()] for name in row_names]
+    widths = [max(len(row[i]) for row in [header] + rows) for i in range(len(header))]
+
+    lines = ["  ".join(cell.ljust(width) for cell, width in zip(row, widths)) for row in [header] + rows]
+    errors = [f"{labels.get(p, p)}: {result}" for p, result in results.items() if isinstance(result, Exception)]
+    return "\n".join(lines), errors
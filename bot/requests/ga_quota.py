@@ -0,0 +1,143 @@
+import asyncio
+import datetime
+import logging
+import threading
+from contextlib import asynccontextmanager
+from bot.config.settings import settings
+
+
+# PropertyQuota fields reported by GA with every response that sets return_property_quota.
+QUOTA_FIELDS = (
+    "tokens_per_day",
+    "tokens_per_hour",
+    "tokens_per_project_per_hour",
+    "concurrent_requests",
+    "server_errors_per_project_per_hour",
+    "potentially_thresholded_requests_per_hour",
+)
+
+
+class QuotaExhaustedError(Exception):
+    """Raised for background reports when the daily quota reserve is reached."""
+
+
+class QuotaTracker:
+    """
+    Records the GA property quota reported by every call and throttles background work.
+
+    GA meters tokens per property, so the snapshot and limits are kept per property
+    ("properties/<id>", as in request.property) and a report only waits on its own property.
+    Interactive requests only wait for a concurrency slot of their property. Background requests are slowed
+    down more and more as the remaining hourly tokens fall towards the reserve. Below the
+    reserve they wait for the next hour; below the daily reserve they are rejected.
+    """
+
+    def __init__(self, tokens_per_day: int, tokens_per_hour: int, max_concurrent: int, reserve: float, max_delay: float = 60.0):
+        self.default_limits = {"tokens_per_day": tokens_per_day, "tokens_per_hour": tokens_per_hour}
+        self.limits = {}  # property -> token limits, default_limits unless set with set_limits()
+        self.max_concurrent = max_concurrent
+        self.reserve = reserve
+        self.max_delay = max_delay
+        self.snapshot = {}  # property -> field -> {"consumed": int, "remaining": int} from its latest response
+        self.tokens_consumed = 0
+        self.requests = 0
+        self.in_flight = 0
+        self.deferred = 0
+        self._lock = threading.Lock()
+        self._semaphores = {}  # property -> semaphore of max_concurrent slots (GA limits concurrency per property)
+
+    def set_limits(self, property: str, tokens_per_day: int, tokens_per_hour: int):
+        """
+        Override the token limits of one property (e.g. a GA 360 property).
+        """
+        self.limits[property] = {"tokens_per_day": tokens_per_day, "tokens_per_hour": tokens_per_hour}
+
+    def record(self, property: str, property_quota):
+        """
+        Store the quota status returned with a response.
+        :param property: Property the request ran against ("properties/<id>").
+        """
+        if not property_quota:
+            return
+        with self._lock:
+            self.requests += 1
+            snapshot = self.snapshot.setdefault(property, {})
+            for name in QUOTA_FIELDS:
+                status = getattr(property_quota, name, None)
+                if status:
+                    snapshot[name] = {"consumed": status.consumed, "remaining": status.remaining}
+            # Only this response's usage: the snapshot still holds earlier values for fields it left out.
+            tokens_per_day = getattr(property_quota, "tokens_per_day", None)
+            if tokens_per_day:
+                self.tokens_consumed += tokens_per_day.consumed
+
+    def remaining_ratio(self, property: str, name: str):
+        """
+        Share of a property's token quota left according to its latest response (1.0 before any call).
+        """
+        status = self.snapshot.get(property, {}).get(name)
+        if status is None:
+            return 1.0
+        return max(status["remaining"], 0) / self.limits.get(property, self.default_limits)[name]
+
+    def background_delay(self, property: str):
+        """
+        Seconds a background request for a property should wait before running.
+        """
+        if self.remaining_ratio(property, "tokens_per_day") < self.reserve:
+            raise QuotaExhaustedError(f"Daily GA quota reserve of {property} reached; background report deferred")
+
+        hourly = self.remaining_ratio(property, "tokens_per_hour")
+        if hourly < self.reserve:
+            now = datetime.datetime.now()
+            next_hour = (now + datetime.timedelta(hours=1)).replace(minute=0, second=0, microsecond=0)
+            return (next_hour - now).total_seconds()
+
+        # Slow down linearly once less than half of the hourly tokens are left.
+        if hourly < 0.5:
+            return self.max_delay * (0.5 - hourly) / (0.5 - self.reserve)
+        return 0.0
+
+    @asynccontextmanager
+    async def throttle(self, property: str, priority: str = "interactive"):
+        """
+        Wait for permission to call GA.
+        :param property: Property the request runs against ("properties/<id>").
+        :param priority: "interactive" for user commands, "background" for scheduled and batch work.
+        """
+        if priority == "background":
+            delay = self.background_delay(property)
+            if delay:
+                self.deferred += 1
+                logging.info(f"GA quota of {property} low, delaying background report by {delay:.0f}s")
+                await asyncio.sleep(delay)
+
+        semaphore = self._semaphores.get(property)
+        if semaphore is None:
+            semaphore = self._semaphores[property] = asyncio.Semaphore(self.max_concurrent)
+        async with semaphore:
+            self.in_flight += 1
+            try:
+                yield
+            finally:
+                self.in_flight -= 1
+
+    def metrics(self):
+        """
+        :return: Dict with the latest quota snapshot per property and usage counters.
+        """
+        return {
+            "quota": {property: dict(snapshot) for property, snapshot in self.snapshot.items()},
+            "tokens_consumed": self.tokens_consumed,
+            "requests": self.requests,
+            "in_flight": self.in_flight,
+            "deferred": self.deferred,
+        }
+
+
+quota_tracker = QuotaTracker(
+    tokens_per_day=settings.ga_tokens_per_day,
+    tokens_per_hour=settings.ga_tokens_per_hour,
+    max_concurrent=settings.ga_max_concurrent,
+    reserve=settings.ga_quota_reserve,
+)
@@ -0,0 +1,135 @@
+import asyncio
+import datetime
+import logging
+from bot.config.settings import settings
+from bot.handlers.google_analytics import run_realtime_report_async
+from bot.requests.ga_store import TRACKED_EVENTS
+
+
+async def fetch_realtime_counts(property_id: str):
+    """
+    Event counts of the tracked events over the last 30 minutes.
+    :return: Dict of event name -> count (events without hits are omitted).
+    """
+    from google.analytics.data_v1beta.types import RunRealtimeReportRequest
+    request = RunRealtimeReportRequest(
+        property=f"properties/{property_id}",
+        dimensions=[{"name": "eventName"}],
+        metrics=[{"name": "eventCount"}],
+        dimension_filter={"filter": {
+            "field_name": "eventName",
+            "in_list_filter": {"values": TRACKED_EVENTS}
+        }},
+    )
+    response = await run_realtime_report_async(request)
+    return {row.dimension_values[0].value: int(row.metric_values[0].value) for row in response.rows}
+
+
+def format_live_message(counts):
+    """
+    Render a realtime snapshot.
+    """
+    if counts is None:
+        return "GA live: waiting for the first update..."
+    lines = ["GA live (last 30 minutes):"]
+    lines += [f"- {event}: {counts.get(event, 0)}" for event in TRACKED_EVENTS]
+    lines.append(f"Updated {datetime.datetime.now().strftime('%H:%M:%S')}")
+    return "\n".join(lines)
+
+
+class RealtimeMonitor:
+    """
+    Polls runRealtimeReport for one property on behalf of every chat watching it.
+
+    Each chat gets one message that is edited only when the counts change. The interval
+    resets to settings.ga_live_min_interval after a change and backs off towards
+    settings.ga_live_max_interval while nothing changes.
+    """
+
+    def __init__(self, property_id: str, bot):
+        self.property_id = property_id
+        self.bot = bot
+        self.subscribers = {}  # chat_id -> message_id of the live message
+        self.counts = None
+        self.interval = settings.ga_live_min_interval
+        self.polls = 0
+        self._task = None
+
+    async def subscribe(self, chat_id: int):
+        """
+        Post the live message in a chat and keep it updated; starts polling if needed.
+        """
+        if chat_id in self.subscribers:
+            return
+        message = await self.bot.send_message(chat_id, format_live_message(self.counts))
+        self.subscribers[chat_id] = message.message_id
+        if self._task is None or self._task.done():
+            self.interval = settings.ga_live_min_interval
+            self._task = asyncio.create_task(self._poll(), name=f"ga_live_{self.property_id}")
+
+    def unsubscribe(self, chat_id: int):
+        """
+        Stop updating a chat; polling stops with the last subscriber.
+        :return: True if the chat was subscribed.
+        """
+        removed = self.subscribers.pop(chat_id, None) is not None
+        if not self.subscribers and self._task is not None:
+            self._task.cancel()
+            self._task = None
+        return removed
+
+    async def _poll(self):
+        while self.subscribers:
+            try:
+                counts = await fetch_realtime_counts(self.property_id)
+                self.polls += 1
+            except Exception as e:
+                logging.error(f"GA realtime poll failed for {self.property_id}: {e}")
+                self.interval = min(self.interval * 2, settings.ga_live_max_interval)
+            else:
+                if counts != self.counts:
+                    self.counts = counts
+                    self.interval = settings.ga_live_min_interval
+                    await self._push()
+                else:
+                    self.interval = min(self.interval * 1.5, settings.ga_live_max_interval)
+            await asyncio.sleep(self.interval)
+
+    async def _push(self):
+        # Only the latest snapshot is sent, so changes between ticks are coalesced into one edit per chat.
+        text = format_live_message(self.counts)
+
+        async def edit(chat_id, message_id):
+            try:
+                await self.bot.edit_message_text(text, chat_id=chat_id, message_id=message_id)
+            except Exception as e:
+                if "message is not modified" in str(e):
+                    return
+                # The live message was deleted or is too old to edit: post a fresh one.
+                logging.warning(f"Re-posting GA live message in {chat_id}: {e}")
+                try:
+                    message = await self.bot.send_message(chat_id, text)
+                    if chat_id in self.subscribers:
+                        self.subscribers[chat_id] = message.message_id
+                except Exception as e:
+                    logging.error(f"Dropping GA live subscriber {chat_id}: {e}")
+                    self.subscribers.pop(chat_id, None)
+
+        await asyncio.gather(*(edit(chat_id, message_id) for chat_id, message_id in list(self.subscribers.items())))
+
+
+_monitors = {}
+
+
+def get_monitor(property_id: str, bot):
+    """
+    Return the shared monitor of a property, creating it on first use.
+    """
+    monitor = _monitors.get(property_id)
+    if monitor is None:
+        monitor = _monitors[property_id] = RealtimeMonitor(property_id, bot)
+    return monitor
+
+
+def find_monitor(property_id: str):
+    return _monitors.get(property_id)
@@ -0,0 +1,167 @@
+from dataclasses import dataclass, field
+
+
+# Metrics that can be summed across events when rows of a fused query are folded back.
+ADDITIVE_METRICS = {"eventCount", "keyEvents"}
+
+REGISTRY = {}
+
+
+@dataclass(frozen=True)
+class ReportSpec:
+    """
+    A GA report declared as data.
+    :param name: Title shown to users; also the registry key.
+    :param label: Lower-case name used in error messages.
+    :param dimensions: Dimension names, in output order.
+    :param metrics: Metric names.
+    :param events: eventName values to filter on (empty means no filter).
+    :param date_range: (start_date, end_date) in GA date syntax.
+    """
+    name: str
+    label: str
+    dimensions: tuple
+    metrics: tuple = ("eventCount",)
+    events: tuple = ()
+    date_range: tuple = ("yesterday", "yesterday")
+
+
+@dataclass
+class PlannedQuery:
+    """
+    One GA query serving one or more ReportSpecs.
+    """
+    dimensions: tuple
+    metrics: tuple
+    events: tuple
+    date_range: tuple
+    specs: list = field(default_factory=list)
+
+
+def register_report(spec: ReportSpec):
+    """
+    Add a report to the registry.
+    :return: The same spec, so it can be assigned at module level.
+    """
+    REGISTRY[spec.name] = spec
+    return spec
+
+
+def _event_filter(events):
+    if len(events) == 1:
+        return {"filter": {"field_name": "eventName", "string_filter": {"value": events[0]}}}
+    return {"filter": {"field_name": "eventName", "in_list_filter": {"values": list(events)}}}
+
+
+def _build(property_id, dimensions, metrics, events, date_range):
+    # Imported here so declaring reports does not load the GA client library (and gRPC).
+    from google.analytics.data_v1beta.types import RunReportRequest
+    request = RunReportRequest(
+        property=f"properties/{property_id}",
+        date_ranges=[{"start_date": date_range[0], "end_date": date_range[1]}],
+        dimensions=[{"name": name} for name in dimensions],
+        metrics=[{"name": name} for name in metrics],
+    )
+    if events:
+        request.dimension_filter = _event_filter(events)
+    return request
+
+
+def build_request(spec: ReportSpec, property_id: str):
+    """
+    Build the RunReportRequest for a single spec.
+    """
+    return _build(property_id, spec.dimensions, spec.metrics, spec.events, spec.date_range)
+
+
+def build_query_request(query: PlannedQuery, property_id: str):
+    """
+    Build the RunReportRequest for a planned (possibly fused) query.
+    """
+    return _build(property_id, query.dimensions, query.metrics, query.events, query.date_range)
+
+
+def _can_fuse(spec: ReportSpec):
+    # Folding rows back requires either one row per event or metrics that can be summed.
+    if not spec.events:
+        return False
+    return "eventName" in spec.dimensions or len(spec.events) == 1 or set(spec.metrics) <= ADDITIVE_METRICS
+
+
+def plan(specs):
+    """
+    Group specs that differ only in their eventName filter into shared queries.
+    Fused queries carry the union of event names and an eventName dimension, so rows can be fanned out again.
+    :param specs: Iterable of ReportSpec.
+    :return: List of PlannedQuery, in order of first appearance.
+    """
+    queries = []
+    fusable = {}
+    for spec in specs:
+        if not _can_fuse(spec):
+            queries.append(PlannedQuery(spec.dimensions, spec.metrics, spec.events, spec.date_range, [spec]))
+            continue
+
+        dimensions = spec.dimensions if "eventName" in spec.dimensions else spec.dimensions + ("eventName",)
+        key = (frozenset(dimensions), spec.metrics, spec.date_range)
+        query = fusable.get(key)
+        if query is None:
+            query = fusable[key] = PlannedQuery(dimensions, spec.metrics, (), spec.date_range)
+            queries.append(query)
+        query.events = tuple(sorted(set(query.events) | set(spec.events)))
+        query.specs.append(spec)
+    return queries
+
+
+def _number(value: str):
+    try:
+        return int(value)
+    except ValueError:
+        return float(value)
+
+
+def fan_out(query: PlannedQuery, response):
+    """
+    Split a query response into one RunReportResponse per spec, in the spec's own dimension layout.
+    :param query: The PlannedQuery the response belongs to.
+    :param response: RunReportResponse for the query.
+    :return: Dict of spec name -> RunReportResponse.
+    """
+    if len(query.specs) == 1 and query.dimensions == query.specs[0].dimensions:
+        return {query.specs[0].name: response}
+
+    from google.analytics.data_v1beta.types import RunReportResponse
+
+    names = [header.name for header in response.dimension_headers]
+    event_index = names.index("eventName")
+    results = {}
+    for spec in query.specs:
+        indexes = [names.index(name) for name in spec.dimensions]
+        wanted = set(spec.events)
+
+        # Rows are keyed by the spec's own dimensions; eventName-less specs are summed across events.
+        totals = {}
+        for row in response.rows:
+            if row.dimension_values[event_index].value not in wanted:
+                continue
+            key = tuple(row.dimension_values[i].value for i in indexes)
+            metrics = [_number(value.value) for value in row.metric_values]
+            if key in totals:
+                totals[key] = [a + b for a, b in zip(totals[key], metrics)]
+            else:
+                totals[key] = metrics
+
+        results[spec.name] = RunReportResponse(
+            dimension_headers=[{"name": name} for name in spec.dimensions],
+            metric_headers=list(response.metric_headers),
+            rows=[
+                {
+                    "dimension_values": [{"value": value} for value in key],
+                    "metric_values": [{"value": str(value)} for value in metrics],
+                }
+                for key, metrics in totals.items()
+            ],
+            row_count=len(totals),
+            metadata=response.metadata,
+        )
+    return results
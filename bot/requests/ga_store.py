@@ -0,0 +1,161 @@
+import datetime
+from zoneinfo import ZoneInfo
+from sqlalchemy import select, delete, func
+from bot.config.settings import settings
+from bot.database.models import GaDailyMetric, async_session
+from bot.handlers.google_analytics import PROPERTY_ID, run_report_async
+from bot.requests.ga_registry import ReportSpec, build_request
+
+
+# Events mirrored into the local daily-metrics table.
+TRACKED_EVENTS = [
+    "register",
+    "ref",
+    "connect_wallet",
+    "exercise_buy",
+    "onboarding_complete",
+    "onboarding_skip",
+    "camera_on",
+    "camera_error",
+    "camera_not_allowed",
+]
+
+
+def property_today():
+    """
+    :return: Today's date in the GA property's timezone.
+    """
+    return datetime.datetime.now(ZoneInfo(settings.ga_timezone)).date()
+
+
+def _date_range(start: datetime.date, end: datetime.date):
+    return [start + datetime.timedelta(days=i) for i in range((end - start).days + 1)]
+
+
+async def backfill_daily_metrics(days: int = None, property_id: str = PROPERTY_ID):
+    """
+    Fetch from GA only the (event, date) pairs missing from the local store.
+    The last settings.ga_store_refresh_days days are always re-fetched, since GA may still be processing them.
+    :param days: Size of the window ending yesterday (defaults to settings.ga_store_days).
+    :param property_id: GA property ID.
+    :return: Number of rows written.
+    """
+    days = days or settings.ga_store_days
+    end = property_today() - datetime.timedelta(days=1)
+    start = end - datetime.timedelta(days=days - 1)
+    refresh_from = end - datetime.timedelta(days=settings.ga_store_refresh_days - 1)
+
+    async with async_session() as session:
+        result = await session.execute(
+            select(GaDailyMetric.event_name, GaDailyMetric.date).where(
+                GaDailyMetric.property_id == property_id,
+                GaDailyMetric.date.between(start, refresh_from - datetime.timedelta(days=1)),
+            )
+        )
+        stored = set(result.all())
+
+    missing = [(event, day) for event in TRACKED_EVENTS for day in _date_range(start, end) if (event, day) not in stored]
+    if not missing:
+        return 0
+
+    # One query covers every event; the date range spans only the missing days.
+    events = sorted({event for event, _ in missing})
+    first, last = min(day for _, day in missing), max(day for _, day in missing)
+    spec = ReportSpec(
+        name="Daily Metrics Backfill",
+        label="daily metrics backfill",
+        dimensions=("date", "eventName"),
+        events=tuple(events),
+        date_range=(first.isoformat(), last.isoformat()),
+    )
+    request = build_request(spec, property_id)
+    # Background priority: the quota throttle may delay this call, so no DB session is held meanwhile.
+    # The cache would keep serving the refresh days' first (partial) counts until midnight, so skip it.
+    response = await run_report_async(request, priority="background", use_cache=False)
+
+    counts = {}
+    for row in response.rows:
+        day = datetime.datetime.strptime(row.dimension_values[0].value, "%Y%m%d").date()
+        counts[(row.dimension_values[1].value, day)] = int(row.metric_values[0].value)
+
+    async with async_session() as session:
+        # Days with no events get an explicit zero so they are not requested again.
+        await session.execute(
+            delete(GaDailyMetric).where(
+                GaDailyMetric.property_id == property_id,
+                GaDailyMetric.date.between(refresh_from, end),
+            )
+        )
+        session.add_all(
+            GaDailyMetric(property_id=property_id, event_name=event, date=day, event_count=counts.get((event, day), 0))
+            for event, day in missing
+        )
+        try:
+            await session.commit()
+        except Exception as e:
+            await session.rollback()
+            raise e
+    return len(missing)
+
+
+async def get_event_series(event_name: str, start: datetime.date, end: datetime.date, property_id: str = PROPERTY_ID):
+    """
+    Read a daily event series from the local store.
+    :return: List of (date, event_count) for every day in the range; days not stored count as 0.
+    """
+    async with async_session() as session:
+        result = await session.execute(
+            select(GaDailyMetric.date, GaDailyMetric.event_count).where(
+                GaDailyMetric.property_id == property_id,
+                GaDailyMetric.event_name == event_name,
+                GaDailyMetric.date.between(start, end),
+            )
+        )
+        counts = dict(result.all())
+    return [(day, counts.get(day, 0)) for day in _date_range(start, end)]
+
+
+async def get_event_total(event_name: str, start: datetime.date, end: datetime.date, property_id: str = PROPERTY_ID):
+    """
+    Sum an event's daily counts over a date range from the local store.
+    """
+    async with async_session() as session:
+        result = await session.execute(
+            select(func.coalesce(func.sum(GaDailyMetric.event_count), 0)).where(
+                GaDailyMetric.property_id == property_id,
+                GaDailyMetric.event_name == event_name,
+                GaDailyMetric.date.between(start, end),
+            )
+        )
+        return result.scalar_one()
+
+
+async def get_trend(event_name: str, days: int = 30):
+    """
+    Daily series for the last `days` days ending yesterday.
+    """
+    end = property_today() - datetime.timedelta(days=1)
+    return await get_event_series(event_name, end - datetime.timedelta(days=days - 1), end)
+
+
+async def compare_periods(event_name: str, first: tuple, second: tuple):
+    """
+    Compare an event's totals over two date ranges.
+    :param first: (start, end) of the baseline period.
+    :param second: (start, end) of the period being compared.
+    :return: Dict with both totals and the relative change (None when the baseline is 0).
+    """
+    baseline = await get_event_total(event_name, *first)
+    current = await get_event_total(event_name, *second)
+    change = (current - baseline) / baseline if baseline else None
+    return {"baseline": baseline, "current": current, "change": change}
+
+
+async def week_over_week(event_name: str):
+    """
+    Compare the last seven complete days with the seven days before them.
+    """
+    end = property_today() - datetime.timedelta(days=1)
+    this_week = (end - datetime.timedelta(days=6), end)
+    last_week = (end - datetime.timedelta(days=13), end - datetime.timedelta(days=7))
+    return await compare_periods(event_name, last_week, this_week)
@@ -0,0 +1,246 @@
+import asyncio
+import logging
+import os
+import time
+from types import SimpleNamespace
+import aiohttp
+from bot.config.settings import settings
+
+
+API_PATH = "/rest/api/2"
+
+
+class JiraError(Exception):
+    """Raised when Jira answers with an error status."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"Jira returned {status}: {message}")
+        self.status = status
+
+
+def to_namespace(value):
+    """
+    Turn decoded JSON into nested namespaces, so results read like jira library objects
+    (issue.key, issue.fields.status.name, ...).
+    """
+    if isinstance(value, dict):
+        return SimpleNamespace(**{key: to_namespace(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return [to_namespace(item) for item in value]
+    return value
+
+
+def to_issue(data: dict, fields: list = None):
+    """
+    Wrap an issue from the REST API; the decoded JSON stays available as issue.raw.
+    :param fields: Fields the query asked for; those Jira left out are set to None.
+    """
+    issue = to_namespace(data)
+    issue.raw = data
+    if not hasattr(issue, "fields"):
+        issue.fields = SimpleNamespace()
+    for field in fields or ():
+        if not hasattr(issue.fields, field):
+            setattr(issue.fields, field, None)
+    return issue
+
+
+class JiraClient:
+    """
+    Async Jira REST v2 client on one aiohttp session.
+
+    The session keeps a pool of keep-alive connections (settings.jira_pool_size), so
+    concurrent commands share TLS connections instead of opening one per call. It is opened
+    on bot startup and closed on shutdown (and re-created if used after closing); idempotent
+    requests are retried once on a fresh connection when a pooled connection drops.
+    """
+
+    def __init__(self, base_url: str, email: str, api_token: str, pool_size: int = 20, timeout: float = 30.0):
+        self.base_url = base_url.rstrip("/")
+        self.auth = aiohttp.BasicAuth(email, api_token)
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._session = None
+        self.reconnects = 0
+        self.last_health = None  # Result of the latest health_check()
+
+    def _get_session(self):
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                auth=self.auth,
+                connector=aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={"Accept": "application/json"},
+            )
+        return self._session
+
+    async def request(self, method: str, path: str, retry: bool = True, **kwargs):
+        """
+        Call a REST endpoint relative to /rest/api/2.
+        :param retry: Reconnect and retry once if the connection drops (leave off for non-idempotent calls).
+        :return: Decoded JSON body, or None for empty responses.
+        """
+        try:
+            return await self._send(method, path, **kwargs)
+        except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError) as e:
+            # The pool discards the broken connection, so the retry opens a fresh one.
+            logging.warning(f"Jira connection failed ({e}), reconnecting")
+            self.reconnects += 1
+            if not retry:
+                raise
+            return await self._send(method, path, **kwargs)
+
+    async def _send(self, method: str, path: str, **kwargs):
+        async with self._get_session().request(method, f"{self.base_url}{API_PATH}{path}", **kwargs) as response:
+            if response.status >= 400:
+                try:
+                    body = await response.json(content_type=None)
+                    message = "; ".join(body.get("errorMessages", []) + [f"{k}: {v}" for k, v in body.get("errors", {}).items()])
+                except Exception:
+                    message = await response.text()
+                raise JiraError(response.status, message or response.reason)
+            if response.status == 204:
+                return None
+            return await response.json(content_type=None)
+
+    async def search(self, jql: str, start_at: int = 0, max_results: int = 100, fields: list = None, expand: list = None):
+        """
+        One page of search results.
+        :return: Decoded search response (startAt, maxResults, total, issues).
+        """
+        payload = {"jql": jql, "startAt": start_at, "maxResults": max_results}
+        if fields is not None:
+            payload["fields"] = list(fields)
+        if expand:
+            payload["expand"] = list(expand)
+        return await self.request("POST", "/search", json=payload)
+
+    async def search_issues(self, jql: str, max_results: int = 100, fields: list = None, expand: list = None):
+        """
+        :param fields: Fields to return; None returns every field, so pass the ones the caller reads.
+        :param expand: Extra data such as "changelog" or "renderedFields"; nothing is expanded by default.
+        :return: List of issues of the first page.
+        """
+        page = await self.search(jql, max_results=max_results, fields=fields, expand=expand)
+        return [to_issue(issue, fields) for issue in page.get("issues", [])]
+
+    async def iter_search_pages(self, jql: str, fields: list = None, expand: list = None, page_size: int = 100,
+                                concurrency: int = 4):
+        """
+        Yield every page of a search as lists of issues.
+        The first page gives the total; the remaining pages are then fetched concurrently
+        (at most `concurrency` at a time) and yielded in completion order, not page order.
+        """
+        first = await self.search(jql, max_results=page_size, fields=fields, expand=expand)
+        yield [to_issue(issue, fields) for issue in first.get("issues", [])]
+
+        # Jira may serve fewer rows per page than asked (Cloud caps at 100), so step by what it returned.
+        step = first.get("maxResults") or page_size
+        total = first.get("total", 0)
+        if step <= 0 or total <= step:
+            return
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(start_at):
+            async with semaphore:
+                return await self.search(jql, start_at=start_at, max_results=step, fields=fields, expand=expand)
+
+        tasks = [asyncio.create_task(fetch(start_at)) for start_at in range(step, total, step)]
+        try:
+            for task in asyncio.as_completed(tasks):
+                page = await task
+                yield [to_issue(issue, fields) for issue in page.get("issues", [])]
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def search_all(self, jql: str, fields: list = None, expand: list = None, page_size: int = 100,
+                         concurrency: int = 4):
+        """
+        :return: List of all matching issues (order across pages is not kept; sort afterwards).
+        """
+        issues = []
+        async for page in self.iter_search_pages(jql, fields, expand, page_size, concurrency):
+            issues.extend(page)
+        return issues
+
+    async def create_issue(self, fields: dict):
+        """
+        Create an issue.
+        :return: The created issue (key, id, self).
+        """
+        return to_issue(await self.request("POST", "/issue", retry=False, json={"fields": fields}))
+
+    async def add_attachment(self, issue_key: str, file, filename: str = None):
+        """
+        Attach a file to an issue; the file is streamed, not read into memory.
+        :param file: Path, binary file object, or async iterable of bytes (requires filename).
+        :return: List of created attachments.
+        """
+        if isinstance(file, (str, os.PathLike)):
+            with open(file, "rb") as f:
+                return await self.add_attachment(issue_key, f, filename or os.path.basename(file))
+
+        form = aiohttp.FormData()
+        form.add_field("file", file, filename=filename or os.path.basename(getattr(file, "name", "attachment")))
+        result = await self.request(
+            "POST", f"/issue/{issue_key}/attachments", retry=False, data=form, headers={"X-Atlassian-Token": "no-check"}
+        )
+        return to_namespace(result)
+
+    async def get_user(self, account_id: str):
+        return to_namespace(await self.request("GET", "/user", params={"accountId": account_id}))
+
+    async def find_users(self, query: str, max_results: int = 50):
+        """
+        Look users up by name or email.
+        """
+        return to_namespace(await self.request("GET", "/user/search", params={"query": query, "maxResults": max_results}))
+
+    async def get_projects(self):
+        return to_namespace(await self.request("GET", "/project"))
+
+    async def server_info(self):
+        return to_namespace(await self.request("GET", "/serverInfo"))
+
+    async def health_check(self):
+        """
+        Check that Jira answers and the credentials are accepted.
+        :return: Dict with ok, latency (seconds), version and error.
+        """
+        started = time.monotonic()
+        try:
+            info = await self.server_info()
+            await self.request("GET", "/myself")
+            self.last_health = {"ok": True, "latency": time.monotonic() - started,
+                                "version": getattr(info, "version", None), "error": None}
+        except Exception as e:
+            self.last_health = {"ok": False, "latency": time.monotonic() - started, "version": None, "error": str(e)}
+        return self.last_health
+
+    async def start(self):
+        """
+        Open the connection pool and log whether Jira is reachable.
+        """
+        health = await self.health_check()
+        if health["ok"]:
+            logging.info(f"Connected to Jira {health['version']} in {health['latency']:.2f}s")
+        else:
+            logging.error(f"Jira health check failed: {health['error']}")
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self.reconnects = 0
+        self.last_health = None
+
+
+jira_client = JiraClient(
+    settings.jira_base_url,
+    settings.jira_email,
+    settings.jira_api_token,
+    pool_size=settings.jira_pool_size,
+    timeout=settings.jira_timeout,
+)
@@ -0,0 +1,178 @@
+import asyncio
+import datetime
+import logging
+import math
+from types import SimpleNamespace
+from sqlalchemy import select, delete
+from bot.config.settings import settings
+from bot.database.models import JiraIssue, JiraSyncState, async_session
+from bot.requests.jira_client import jira_client
+
+
+SYNC_NAME = "jira_issues"
+# Everything the Jira formatters read, plus what the mirror needs to file the issue.
+MIRROR_FIELDS = ["summary", "status", "assignee", "parent", "description", "issuetype", "project", "updated",
+                 "customfield_10104", "customfield_10105"]
+
+# Start of the last successful sync; None until the mirror has been filled at least once.
+_last_sync = None
+# Keeps the incremental and the daily full sync from interleaving their writes.
+_sync_lock = asyncio.Lock()
+
+
+def mirrored_projects():
+    """
+    :return: Project keys from settings.jira_mirror_projects.
+    """
+    return [key.strip() for key in settings.jira_mirror_projects.split(",") if key.strip()]
+
+
+def _parse_time(value):
+    return datetime.datetime.strptime(value, "%Y-%m-%dT%H:%M:%S.%f%z") if value else None
+
+
+def issue_row(data: dict):
+    """
+    Column values of a JiraIssue from an issue as returned by the REST API.
+    """
+    fields = data.get("fields") or {}
+    status = (fields.get("status") or {}).get("name")
+    assignee = fields.get("assignee") or {}
+    return {
+        "key": data["key"],
+        "project_key": (fields.get("project") or {}).get("key") or data["key"].split("-")[0],
+        "issue_type": (fields.get("issuetype") or {}).get("name"),
+        "summary": fields.get("summary"),
+        "status": status,
+        "status_key": status.upper() if status else None,
+        "assignee_account_id": assignee.get("accountId"),
+        "assignee_name": assignee.get("displayName"),
+        "parent_key": (fields.get("parent") or {}).get("key"),
+        "description": fields.get("description"),
+        "figma_link": fields.get("customfield_10104"),
+        "confluence_link": fields.get("customfield_10105"),
+        "updated": _parse_time(fields.get("updated")),
+    }
+
+
+def row_to_issue(row: JiraIssue):
+    """
+    Rebuild the issue shape the formatters read (issue.key, issue.fields.status.name, ...).
+    """
+    assignee = None
+    if row.assignee_account_id:
+        assignee = SimpleNamespace(accountId=row.assignee_account_id, displayName=row.assignee_name)
+    return SimpleNamespace(key=row.key, fields=SimpleNamespace(
+        summary=row.summary,
+        status=SimpleNamespace(name=row.status),
+        assignee=assignee,
+        parent=SimpleNamespace(key=row.parent_key) if row.parent_key else None,
+        description=row.description,
+        issuetype=SimpleNamespace(name=row.issue_type),
+        customfield_10104=row.figma_link,
+        customfield_10105=row.confluence_link,
+    ))
+
+
+async def upsert_issues(session, rows: list):
+    """
+    Insert or update mirrored issues by key with one SELECT for the whole batch.
+    """
+    if not rows:
+        return
+    existing = {
+        issue.key: issue
+        for issue in (await session.execute(select(JiraIssue).where(JiraIssue.key.in_([row["key"] for row in rows])))).scalars()
+    }
+    for row in rows:
+        issue = existing.get(row["key"])
+        if issue is None:
+            session.add(JiraIssue(**row))
+        else:
+            for name, value in row.items():
+                setattr(issue, name, value)
+
+
+async def sync_jira_issues(full: bool = False):
+    """
+    Bring the local mirror up to date with Jira.
+    After the first run only issues updated since the previous sync (plus settings.jira_sync_margin
+    minutes) are fetched. A full sync also drops issues that no longer match, e.g. deleted ones.
+    :return: Number of issues written.
+    """
+    async with _sync_lock:
+        return await _sync(full)
+
+
+async def _sync(full: bool):
+    global _last_sync
+    projects = mirrored_projects()
+    started = datetime.datetime.now(datetime.timezone.utc)
+
+    async with async_session() as session:
+        state = await session.get(JiraSyncState, SYNC_NAME)
+        last_sync = state.last_sync if state else None
+    if last_sync is not None and last_sync.tzinfo is None:
+        last_sync = last_sync.replace(tzinfo=datetime.timezone.utc)
+    full = full or last_sync is None
+
+    quoted = ", ".join(f'"{key}"' for key in projects)
+    jql = f"project IN ({quoted})"
+    if not full:
+        # Relative JQL dates avoid depending on the timezone of the Jira user profile.
+        minutes = math.ceil((started - last_sync).total_seconds() / 60) + settings.jira_sync_margin
+        jql += f' AND updated >= "-{minutes}m"'
+
+    rows = [
+        issue_row(issue.raw)
+        for issue in await jira_client.search_all(jql, fields=MIRROR_FIELDS, page_size=settings.jira_page_size,
+                                                  concurrency=settings.jira_search_concurrency)
+    ]
+
+    async with async_session() as session:
+        await upsert_issues(session, rows)
+        if full:
+            await session.execute(delete(JiraIssue).where(
+                JiraIssue.project_key.in_(projects),
+                JiraIssue.key.not_in([row["key"] for row in rows]),
+            ))
+        await session.merge(JiraSyncState(name=SYNC_NAME, last_sync=started))
+        await session.commit()
+
+    _last_sync = started
+    logging.info(f"Jira mirror {'full' if full else 'incremental'} sync: {len(rows)} issues")
+    return len(rows)
+
+
+def mirror_ready():
+    return _last_sync is not None
+
+
+async def find_issues(project_key: str = None, statuses: list = None, assignee_account_id: str = None,
+                      issue_type: str = None):
+    """
+    Query the local mirror. Only queries scoped to a mirrored project are answered, since the
+    mirror holds nothing from other projects.
+    :return: List of issues ordered by parent and key, or None when the mirror cannot answer
+             (not synced yet, no or unmirrored project, or the database failed) and Jira must be asked.
+    """
+    if not mirror_ready() or project_key not in mirrored_projects():
+        return None
+
+    query = select(JiraIssue)
+    if project_key:
+        query = query.where(JiraIssue.project_key == project_key)
+    if statuses:
+        query = query.where(JiraIssue.status_key.in_([status.upper() for status in statuses]))
+    if assignee_account_id:
+        query = query.where(JiraIssue.assignee_account_id == assignee_account_id)
+    if issue_type:
+        query = query.where(JiraIssue.issue_type == issue_type)
+    query = query.order_by(JiraIssue.parent_key, JiraIssue.key)
+
+    try:
+        async with async_session() as session:
+            return [row_to_issue(row) for row in (await session.execute(query)).scalars()]
+    except Exception as e:
+        logging.error(f"Jira mirror query failed, asking Jira instead: {e}")
+        return None
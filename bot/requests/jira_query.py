@@ -0,0 +1,126 @@
+import asyncio
+import re
+import time
+from collections import OrderedDict
+from bot.config.settings import settings
+from bot.requests.jira_client import jira_client
+from bot.requests.jira_webhook import add_listener
+
+
+_QUOTED_OR_SPACE = re.compile(r'("(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\')|\s+')
+
+
+def normalize_jql(jql: str):
+    """
+    Canonical form of a JQL query for cache keys: whitespace collapsed and everything outside
+    quoted values lower-cased (JQL keywords, fields and functions are case-insensitive).
+    """
+    parts = []
+    position = 0
+    for match in _QUOTED_OR_SPACE.finditer(jql):
+        parts.append(jql[position:match.start()].lower())
+        parts.append(match.group(1) or " ")
+        position = match.end()
+    parts.append(jql[position:].lower())
+    return "".join(parts).strip()
+
+
+class JqlCache:
+    """
+    TTL- and size-bounded cache of Jira search results with single-flight loading.
+
+    Identical queries (after normalize_jql) arriving while one is in flight wait for that
+    request instead of sending their own, so a burst costs one Jira call.
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, result), least recently used first
+        self._inflight = {}  # key -> task fetching it
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.invalidations = 0
+
+    async def get_or_fetch(self, key, fetch):
+        """
+        :param key: Hashable cache key.
+        :param fetch: Coroutine function producing the result on a miss.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            del self._entries[key]
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = self._inflight[key] = asyncio.ensure_future(self._load(key, fetch))
+        # Shielded so a caller that gives up does not cancel the request for the others.
+        return await asyncio.shield(task)
+
+    async def _load(self, key, fetch):
+        generation = self.invalidations
+        try:
+            result = await fetch()
+        finally:
+            # An invalidation may have detached this task and a newer fetch may own the key.
+            if self._inflight.get(key) is asyncio.current_task():
+                del self._inflight[key]
+        # Do not store a result that an invalidation arriving mid-request has already made stale.
+        if generation == self.invalidations:
+            self._entries[key] = (time.monotonic() + self.ttl, result)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return result
+
+    def invalidate(self):
+        # Requests already in flight may predate the change, so later callers must not join them.
+        self._entries.clear()
+        self._inflight.clear()
+        self.invalidations += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "in_flight": len(self._inflight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "invalidations": self.invalidations,
+            "hit_ratio": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+        }
+
+
+jql_cache = JqlCache(settings.jira_cache_ttl, settings.jira_cache_size)
+
+
+async def cached_search_issues(jql: str, max_results: int = 100, fields: list = None):
+    """
+    Cached jira_client.search_issues.
+    """
+    key = ("page", normalize_jql(jql), max_results, None if fields is None else tuple(fields))
+    return await jql_cache.get_or_fetch(key, lambda: jira_client.search_issues(jql, max_results=max_results, fields=fields))
+
+
+async def cached_search_all(jql: str, fields: list = None):
+    """
+    Cached jira_client.search_all (every page, fetched concurrently).
+    """
+    key = ("all", normalize_jql(jql), None if fields is None else tuple(fields))
+    return await jql_cache.get_or_fetch(key, lambda: jira_client.search_all(
+        jql, fields=fields, page_size=settings.jira_page_size, concurrency=settings.jira_search_concurrency
+    ))
+
+
+@add_listener
+async def _invalidate_on_issue_event(event: str, issue_key: str, project_key: str):
+    # Any change can move an issue in or out of a cached result; queries are cheap to redo.
+    jql_cache.invalidate()
@@ -0,0 +1,56 @@
+import tempfile
+from bot.config.settings import settings
+from bot.requests.jira_client import jira_client
+
+
+CHUNK_SIZE = 64 * 1024
+
+
+def attachment_from_message(message):
+    """
+    Describe the photo or document of a message for the FSM state, without downloading it.
+    :return: Dict (file_id, file_name, file_size), or None when the message has no media.
+    """
+    if message.photo:
+        photo = message.photo[-1]  # Highest resolution
+        return {"file_id": photo.file_id, "file_name": f"photo_{photo.file_unique_id}.jpg", "file_size": photo.file_size}
+    if message.document:
+        document = message.document
+        return {
+            "file_id": document.file_id,
+            "file_name": document.file_name or f"file_{document.file_unique_id}",
+            "file_size": document.file_size,
+        }
+    return None
+
+
+async def telegram_chunks(bot, file_id: str):
+    """
+    Stream a Telegram file in chunks straight from the Bot API, without buffering it whole.
+    The download gets the same time budget as a Jira request (settings.jira_timeout).
+    """
+    file = await bot.get_file(file_id)
+    url = bot.session.api.file_url(bot.token, file.file_path)
+    timeout = max(int(settings.jira_timeout), 1)
+    async for chunk in bot.session.stream_content(url, timeout=timeout, chunk_size=CHUNK_SIZE, raise_for_status=True):
+        yield chunk
+
+
+async def relay_attachment(bot, issue_key: str, attachment: dict):
+    """
+    Copy a Telegram file into a Jira attachment.
+    Files up to settings.jira_relay_direct_limit are piped from the Telegram download into the
+    Jira upload chunk by chunk. Larger or unknown-size files are first spooled, in memory up to
+    the same limit and on disk beyond it, so the Telegram download is not held open for the
+    whole Jira upload.
+    """
+    chunks = telegram_chunks(bot, attachment["file_id"])
+    size = attachment.get("file_size")
+    if size is not None and size <= settings.jira_relay_direct_limit:
+        return await jira_client.add_attachment(issue_key, chunks, attachment["file_name"])
+
+    with tempfile.SpooledTemporaryFile(max_size=settings.jira_relay_direct_limit) as spool:
+        async for chunk in chunks:
+            spool.write(chunk)
+        spool.seek(0)
+        return await jira_client.add_attachment(issue_key, spool, attachment["file_name"])
@@ -0,0 +1,107 @@
+from jinja2 import Environment
+from bot.config.settings import settings
+from bot.requests.telegram_text import MESSAGE_LIMIT, stream_chunks
+
+
+# Characters with a meaning in Telegram's legacy Markdown.
+_MARKDOWN_ESCAPES = str.maketrans({"_": "\\_", "*": "\\*", "`": "\\`", "[": "\\["})
+
+_env = Environment(trim_blocks=True, lstrip_blocks=True, autoescape=False, keep_trailing_newline=True)
+
+# Compiled once at import; rendering only runs the generated code.
+TEMPLATES = {name: _env.from_string(source) for name, source in {
+    "bugs": """\
+**All Bugs (TO DO, IN PROGRESS, IN REVIEW):**
+{% for parent, tasks in groups %}
+
+**Parent:** {{ parent }}
+{% for task in tasks %}
+- **{{ task.key }}**: {{ task.summary }} (Status: {{ task.status }}, Assignee: {{ task.assignee }})
+  Description: {{ task.description }}
+  [View on Jira]({{ task.link }})
+{% endfor %}
+{% endfor %}
+""",
+    "in_progress": """\
+Current IN PROGRESS tasks in project FA:
+{% for parent, assignees in groups %}
+
+**Parent:** {{ parent }}
+{% for assignee, tasks in assignees %}
+
+{{ assignee }}:
+{% for task in tasks %}
+- **{{ task.key }}**: {{ task.summary }} (Assignee: {{ assignee }})
+  [Jira Link]({{ task.link }})
+{% endfor %}
+{% endfor %}
+{% endfor %}
+""",
+    "on_dev": """\
+ON DEV tasks in project FA:
+{% for parent, tasks in groups %}
+
+**Parent:** {{ parent }}
+{% for task in tasks %}
+- **{{ task.key }}**: {{ task.summary }} (Assignee: {{ task.assignee }})
+  [Jira Link]({{ task.link }})
+{% endfor %}
+{% endfor %}
+""",
+    "tasks": """\
+Your tasks:
+{% for task in tasks %}
+- **{{ task.key }}**: {{ task.summary }} (Status: {{ task.status }}, Assignee: {{ task.assignee }})
+  [Jira Link]({{ task.link }})
+{% if task.figma_link %}
+  [Figma Design]({{ task.figma_link }})
+{% endif %}
+{% if task.confluence_link %}
+  [Confluence Doc]({{ task.confluence_link }})
+{% endif %}
+{% endfor %}
+""",
+}.items()}
+
+
+def escape_markdown(value):
+    return str(value).translate(_MARKDOWN_ESCAPES)
+
+
+def issue_view(issue):
+    """
+    Everything the templates print for one issue, escaped once.
+    """
+    fields = issue.fields
+    assignee = fields.assignee.displayName if getattr(fields, "assignee", None) else "Unassigned"
+    parent = getattr(fields, "parent", None)
+    status = getattr(fields, "status", None)
+    return {
+        "key": escape_markdown(issue.key),
+        "summary": escape_markdown(fields.summary or ""),
+        "status": escape_markdown(status.name if status else ""),
+        "assignee": escape_markdown(assignee),
+        "parent": escape_markdown(parent.key if parent else "No Parent"),
+        "description": escape_markdown(getattr(fields, "description", None) or "No description provided."),
+        "link": f"{settings.jira_base_url.rstrip('/')}/browse/{issue.key}",
+        "figma_link": getattr(fields, "customfield_10104", None),
+        "confluence_link": getattr(fields, "customfield_10105", None),
+    }
+
+
+def group_issues(views, by: str, sort: bool = True):
+    """
+    Group issue views by one of their keys in a single pass.
+    :return: List of (value, views) pairs, sorted by value unless sort is False (first-seen order).
+    """
+    groups = {}
+    for view in views:
+        groups.setdefault(view[by], []).append(view)
+    return sorted(groups.items()) if sort else list(groups.items())
+
+
+def render(name: str, limit: int = MESSAGE_LIMIT, **context):
+    """
+    Render a listing template as a stream of Telegram-sized Markdown messages.
+    """
+    return stream_chunks(TEMPLATES[name].generate(**context), limit)
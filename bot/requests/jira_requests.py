@@ -1,4 +1,3 @@
-from jira import JIRA
 from bot.config.settings import settings
 import requests, asyncio, datetime
 from bot.database.models import JiraUser, async_session
@@ -6,31 +5,46 @@ from bot.config.settings import settings
 from sqlalchemy import select
 from aiogram.types import Message
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+from bot.requests.jira_client import jira_client
+from bot.requests.jira_mirror import find_issues
+from bot.requests.jira_query import cached_search_issues, cached_search_all, jql_cache
+from bot.requests.jira_relay import relay_attachment
+from bot.requests.jira_render import render, issue_view, group_issues
 
 
-jira = JIRA(
-    server=settings.jira_base_url,
-    basic_auth=(settings.jira_email, settings.jira_api_token)
-    )
+# Fields each listing reads; searches ask only for these instead of every field of every issue.
+LIST_FIELDS = ["summary", "status", "assignee", "parent"]
+BUG_FIELDS = LIST_FIELDS + ["description"]
+TASK_FIELDS = LIST_FIELDS + ["customfield_10104", "customfield_10105"]  # Figma and Confluence links
 
 
-def sync_create_jira_task(issue_dict):
-    return jira.create_issue(fields=issue_dict)
+async def create_jira_task(issue_dict):
+    """
+    Create a Jira issue without blocking the event loop.
+    :param issue_dict: Fields built by create_issue_dict / create_bug_dict.
+    :return: The created issue (issue.key).
+    """
+    issue = await jira_client.create_issue(issue_dict)
+    jql_cache.invalidate()
+    return issue
 
 
 async def get_issues_by_account_id(account_id: str, statuses: list = None):
     statuses = statuses or ["TO DO", "IN PROGRESS", "IN REVIEW"]
+    # Not scoped to a project, so the mirror (mirrored projects only) cannot answer it.
     jql = f"""assignee = "{account_id}" AND status IN ({", ".join([f'"{status}"' for status in statuses])})"""
     try:
-        result = jira.search_issues(jql, maxResults=100)  # Fetch up to 100 issues (adjust as needed)
-        print(result)
-        return list(result)  # Convert the ResultList to a standard list
+        return await cached_search_issues(jql, max_results=100, fields=TASK_FIELDS)  # Fetch up to 100 issues (adjust as needed)
     except Exception as e:
         raise Exception(f"Failed to fetch issues: {e}")
 
 
-async def get_issues_by_status(account_id: str = None, status: str = None, project_key: str = None):
+async def get_issues_by_status(account_id: str = None, status: str = None, project_key: str = None, fields: list = None):
+    issues = await find_issues(project_key=project_key, statuses=[status] if status else None,
+                               assignee_account_id=account_id)
+    if issues is not None:
+        return issues
+
     jql_parts = []
     if account_id:
         jql_parts.append(f'assignee = "{account_id}"')
@@ -42,8 +56,7 @@ async def get_issues_by_status(account_id: str = None, status: str = None, proje
     jql = " AND ".join(jql_parts)
 
     try:
-        result = jira.search_issues(jql, maxResults=100)  # Fetch up to 100 issues
-        return list(result)
+        return await cached_search_issues(jql, max_results=100, fields=fields or LIST_FIELDS)  # Fetch up to 100 issues
     except Exception as e:
         raise Exception(f"Failed to fetch issues: {e}")
 
@@ -54,11 +67,14 @@ async def get_all_bugs():
         project = "FA" AND issuetype = "Bug" AND status IN ({", ".join(f'"{status}"' for status in statuses)})
     """
     try:
-        issues = jira.search_issues(jql, maxResults=1000)  # Adjust maxResults as needed
+        issues = await find_issues(project_key="FA", statuses=statuses, issue_type="Bug")
+        if issues is None:
+            # Pages are fetched concurrently and collected as they arrive; identical bursts share one fetch.
+            issues = await cached_search_all(jql, fields=BUG_FIELDS)
         return sorted(
             issues,
             key=lambda issue: (
-                issue.fields.parent.key if hasattr(issue.fields, "parent") else "No Parent",
+                issue.fields.parent.key if getattr(issue.fields, "parent", None) else "No Parent",
                 issue.fields.summary.lower(),
                 issue.fields.status.name,
                 issue.fields.assignee.displayName.lower() if issue.fields.assignee else "Unassigned",
@@ -69,152 +85,54 @@ async def get_all_bugs():
 
 
 def format_bugs_list(issues):
-    tasks_by_parent = {}
-    for issue in issues:
-        parent = issue.fields.parent.key if hasattr(issue.fields, "parent") else "No Parent"
-        if parent not in tasks_by_parent:
-            tasks_by_parent[parent] = []
-        tasks_by_parent[parent].append(issue)
-
-    response = "**All Bugs (TO DO, IN PROGRESS, IN REVIEW):**\n"
-    for parent, tasks in tasks_by_parent.items():
-        response += f"\n**Parent:** {parent}\n"
-        for task in tasks:
-            title = task.fields.summary
-            status = task.fields.status.name
-            assignee = task.fields.assignee.displayName if task.fields.assignee else "Unassigned"
-            description = task.fields.description or "No description provided."
-            jira_link = f"https://your-jira-instance.atlassian.net/browse/{task.key}"
-
-            response += (
-                f"- **{task.key}**: {title} (Status: {status}, Assignee: {assignee})\n"
-                f"  Description: {description}\n"
-                f"  [View on Jira]({jira_link})\n"
-            )
-
-    return response if response.strip() else "No bugs found."
+    """
+    Render bugs grouped by parent, in the order get_all_bugs sorted them.
+    :return: Generator of Markdown messages that fit Telegram's size limit.
+    """
+    return render("bugs", groups=group_issues(map(issue_view, issues), "parent", sort=False))
 
 
 async def get_in_progress_issues():
     jql = 'project = "FA" AND status = "IN PROGRESS" ORDER BY parent ASC'
+    issues = await find_issues(project_key="FA", statuses=["IN PROGRESS"])
+    if issues is not None:
+        return issues
 
     try:
-        jira = JIRA(
-            server=settings.jira_base_url,
-            basic_auth=(settings.jira_email, settings.jira_api_token)
-        )
-        return jira.search_issues(jql)
+        return await cached_search_issues(jql, max_results=50, fields=LIST_FIELDS)
     except Exception as e:
         raise Exception(f"Failed to fetch IN PROGRESS issues for project FA: {e}")
 
 
 def format_in_progress_issues(issues):
-    tasks_by_parent = {}
-    for issue in issues:
-        parent = issue.fields.parent.key if hasattr(issue.fields, "parent") else "No Parent"
-        if parent not in tasks_by_parent:
-            tasks_by_parent[parent] = []
-        tasks_by_parent[parent].append(issue)
-
-    # Sort parents alphabetically
-    sorted_parents = sorted(tasks_by_parent.keys())
-
-    # Format the grouped tasks
-    response = "Current IN PROGRESS tasks in project FA:\n"
-    for parent in sorted_parents:
-        response += f"\n**Parent:** {parent}\n"
-
-        # Group tasks by assignee
-        tasks_by_assignee = {}
-        for task in tasks_by_parent[parent]:
-            assignee = task.fields.assignee.displayName if task.fields.assignee else "Unassigned"
-            if assignee not in tasks_by_assignee:
-                tasks_by_assignee[assignee] = []
-            tasks_by_assignee[assignee].append(task)
-
-        # Sort assignees alphabetically
-        sorted_assignees = sorted(tasks_by_assignee.keys())
-
-        # Format tasks for each assignee
-        for assignee in sorted_assignees:
-            response += f"\n{assignee}:\n"
-            for task in tasks_by_assignee[assignee]:
-                key = task.key
-                summary = task.fields.summary
-                jira_link = f"https://your-jira-instance.atlassian.net/browse/{key}"
-
-                # Add task details with links
-                response += f"- **{key}**: {summary} (Assignee: {assignee})\n"
-                response += f"  [Jira Link]({jira_link})\n"
-
-    if not response.strip():
-        return "No tasks found."
-
-    return response
+    """
+    Render tasks grouped by parent, then by assignee, both sorted alphabetically.
+    :return: Generator of Markdown messages that fit Telegram's size limit.
+    """
+    tree = {}
+    for view in map(issue_view, issues):
+        tree.setdefault(view["parent"], {}).setdefault(view["assignee"], []).append(view)
+    groups = [(parent, sorted(assignees.items())) for parent, assignees in sorted(tree.items())]
+    return render("in_progress", groups=groups)
 
 
 def format_on_dev_tasks(issues):
-    tasks_by_parent = {}
-    for issue in issues:
-        parent = issue.fields.parent.key if hasattr(issue.fields, "parent") else "No Parent"
-        if parent not in tasks_by_parent:
-            tasks_by_parent[parent] = []
-        tasks_by_parent[parent].append(issue)
-
-    # Sort parents alphabetically
-    sorted_parents = sorted(tasks_by_parent.keys())
-
-    # Format the grouped tasks
-    response = "ON DEV tasks in project FA:\n"
-    for parent in sorted_parents:
-        response += f"\n**Parent:** {parent}\n"
-        for task in tasks_by_parent[parent]:
-            # Task details
-            key = task.key
-            summary = task.fields.summary
-            assignee = task.fields.assignee.displayName if task.fields.assignee else "Unassigned"
-            jira_link = f"https://your-jira-instance.atlassian.net/browse/{key}"
-
-            # Add task details with links
-            response += f"- **{key}**: {summary} (Assignee: {assignee})\n"
-            response += f"  [Jira Link]({jira_link})\n"
-
-    if not response.strip():
-        return "No tasks found."
-
-    return response
-
-
-def format_tasks_with_links(issues):
+    """
+    Render tasks grouped by parent, sorted alphabetically.
+    :return: Generator of Markdown messages that fit Telegram's size limit.
+    """
+    return render("on_dev", groups=group_issues(map(issue_view, issues), "parent"))
+
+
+def format_tasks_with_links(issues, limit: int = None):
     """
     Format Jira tasks into a readable text with links and additional details.
     :param issues: List of Jira Issue objects.
     :param limit: Maximum number of tasks to include in the response.
-    :return: Formatted string of tasks.
+    :return: Generator of Markdown messages that fit Telegram's size limit.
     """
-    response = "Your tasks:\n"
-
-    for issue in issues:
-        # Extract task details
-        key = issue.key
-        summary = issue.fields.summary
-        status = issue.fields.status.name
-        assignee = issue.fields.assignee.displayName if issue.fields.assignee else "Unassigned"
-        jira_link = f"https://your-jira-instance.atlassian.net/browse/{key}"  # Generate the Jira link
-
-        # Format task details
-        response += f"- **{key}**: {summary} (Status: {status}, Assignee: {assignee})\n"
-        response += f"  [Jira Link]({jira_link})\n"
-
-        # Add links for Figma and Confluence if available
-        figma_link = getattr(issue.fields, "customfield_10104", None)
-        confluence_link = getattr(issue.fields, "customfield_10105", None)
-        if figma_link:
-            response += f"  [Figma Design]({figma_link})\n"
-        if confluence_link:
-            response += f"  [Confluence Doc]({confluence_link})\n"
-
-    return response
+    return render("tasks", tasks=[issue_view(issue) for issue in issues[:limit]])
+
 
 async def add_user(name: str = None, telegram_id: int = None, email: str = None, account_id: str = None):
     """Adds a new Jira user to the database."""
@@ -250,11 +168,7 @@ async def get_on_dev_issues():
     jql = 'status = "ON DEV" ORDER BY parent ASC'
 
     try:
-        jira = JIRA(
-            server=settings.jira_base_url,
-            basic_auth=(settings.jira_email, settings.jira_api_token)
-        )
-        return jira.search_issues(jql)
+        return await cached_search_issues(jql, max_results=50, fields=LIST_FIELDS)
     except Exception as e:
         raise Exception(f"Failed to fetch ON DEV issues: {e}")
 
@@ -265,16 +179,54 @@ async def add_attachment_async(issue_key, file_path):
     :param issue_key: The key of the Jira issue (e.g., "FA-100").
     :param file_path: Path to the file to be uploaded.
     """
-    def upload_attachment():
-        jira = JIRA(
-            server=settings.jira_base_url,
-            basic_auth=(settings.jira_email, settings.jira_api_token)
-        )
-        with open(file_path, "rb") as f:
-            jira.add_attachment(issue=issue_key, attachment=f)
+    await jira_client.add_attachment(issue_key, file_path)
 
-    with ThreadPoolExecutor() as executor:
-        await asyncio.get_event_loop().run_in_executor(executor, upload_attachment)
+
+async def upload_attachments(issue_key: str, attachments: list, bot, on_progress=None):
+    """
+    Relay Telegram files to a Jira issue concurrently over the shared connection pool.
+    At most settings.jira_upload_concurrency uploads run at once; nothing is written to disk
+    unless a file is larger than settings.jira_relay_direct_limit.
+    :param attachments: Dicts from attachment_from_message (file_id, file_name, file_size).
+    :param on_progress: Optional coroutine function awaited with the results list whenever a file finishes.
+    :return: List of dicts (name, size, ok, error) in the order of attachments.
+    """
+    semaphore = asyncio.Semaphore(settings.jira_upload_concurrency)
+    results = [
+        {"name": attachment["file_name"], "size": attachment.get("file_size"), "ok": None, "error": None}
+        for attachment in attachments
+    ]
+
+    async def upload(attachment, result):
+        async with semaphore:
+            try:
+                await relay_attachment(bot, issue_key, attachment)
+                result["ok"] = True
+            except Exception as e:
+                result["ok"] = False
+                result["error"] = str(e)
+        if on_progress:
+            await on_progress(results)
+
+    await asyncio.gather(*(upload(attachment, result) for attachment, result in zip(attachments, results)))
+    return results
+
+
+def format_upload_summary(results):
+    """
+    One line per attachment: uploaded, failed (with the reason) or still pending.
+    """
+    lines = []
+    for result in results:
+        size = f" ({result['size'] / 1024:.0f} KB)" if result["size"] is not None else ""
+        if result["ok"]:
+            lines.append(f"✅ {result['name']}{size}")
+        elif result["ok"] is None:
+            lines.append(f"⏳ {result['name']}{size}")
+        else:
+            lines.append(f"❌ {result['name']}{size}: {result['error']}")
+    done = sum(1 for result in results if result["ok"])
+    return f"Attachments: {done}/{len(results)} uploaded\n" + "\n".join(lines)
 
 
 async def get_user_by_tg_id(telegram_id: int):
@@ -290,15 +242,15 @@ async def get_user_by_tg_id(telegram_id: int):
 
 
 
-def get_all_projects(jira_instance):
-    projects = jira_instance.projects()
+async def get_all_projects():
+    projects = await jira_client.get_projects()
     project_list = [(project.name, project.key) for project in projects]
     return project_list
 
 
-def get_tasks_in_project(jira_instance, project_key):
+async def get_tasks_in_project(project_key):
     jql_query = f'project="{project_key}" ORDER BY created DESC'
-    issues = jira_instance.search_issues(jql_query, maxResults=50)  # Fetch up to 50 tasks (can be adjusted)
+    issues = await cached_search_issues(jql_query, max_results=50, fields=["summary"])  # Fetch up to 50 tasks (can be adjusted)
     task_list = [(issue.key, issue.fields.summary) for issue in issues]
     return task_list
 
@@ -0,0 +1,119 @@
+import datetime
+import hashlib
+import hmac
+import json
+import logging
+from aiohttp import web
+from sqlalchemy import delete
+from bot.config.settings import settings
+from bot.database.models import JiraIssue, async_session
+from bot.requests.jira_mirror import issue_row, mirrored_projects, upsert_issues
+
+
+ISSUE_EVENTS = ("jira:issue_created", "jira:issue_updated", "jira:issue_deleted")
+
+# Callbacks run after every applied issue event: callback(event, issue_key, project_key).
+_listeners = []
+
+
+def add_listener(callback):
+    """
+    Register a coroutine function to be awaited on every issue event (e.g. to drop cached results).
+    """
+    _listeners.append(callback)
+    return callback
+
+
+async def notify_listeners(event: str, issue_key: str, project_key: str):
+    for callback in _listeners:
+        try:
+            await callback(event, issue_key, project_key)
+        except Exception as e:
+            logging.error(f"Jira webhook listener {callback.__name__} failed: {e}")
+
+
+def sign(body: bytes, secret: str):
+    """
+    :return: X-Hub-Signature value Jira sends for a body signed with `secret`.
+    """
+    return "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def verify(request: web.Request, body: bytes, secret: str):
+    """
+    Accept a request signed with the webhook secret (X-Hub-Signature), or, for webhooks
+    registered without signing, one carrying the secret as the `secret` query parameter.
+    """
+    signature = request.headers.get("X-Hub-Signature")
+    if signature:
+        return hmac.compare_digest(signature, sign(body, secret))
+    return hmac.compare_digest(request.query.get("secret", ""), secret)
+
+
+async def apply_issue_event(payload: dict):
+    """
+    Apply one webhook payload to the local mirror and notify listeners.
+    :return: The issue key, or None when the event was ignored.
+    """
+    event = payload.get("webhookEvent")
+    issue = payload.get("issue") or {}
+    if event not in ISSUE_EVENTS or "key" not in issue:
+        return None
+
+    row = issue_row(issue)
+    if row["project_key"] in mirrored_projects():
+        async with async_session() as session:
+            if event == "jira:issue_deleted":
+                await session.execute(delete(JiraIssue).where(JiraIssue.key == row["key"]))
+            else:
+                current = await session.get(JiraIssue, row["key"])
+                # Deliveries can arrive out of order; never overwrite a newer version.
+                if current is not None and current.updated and row["updated"]:
+                    current_updated = current.updated
+                    if current_updated.tzinfo is None:
+                        current_updated = current_updated.replace(tzinfo=datetime.timezone.utc)
+                    if current_updated > row["updated"]:
+                        return row["key"]
+                await upsert_issues(session, [row])
+            await session.commit()
+
+    await notify_listeners(event, row["key"], row["project_key"])
+    return row["key"]
+
+
+async def handle_webhook(request: web.Request):
+    body = await request.read()
+    if not verify(request, body, settings.jira_webhook_secret):
+        return web.Response(status=401, text="invalid signature")
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return web.Response(status=400, text="invalid JSON")
+
+    try:
+        key = await apply_issue_event(payload)
+    except Exception as e:
+        logging.error(f"Failed to apply Jira webhook {payload.get('webhookEvent')}: {e}")
+        return web.Response(status=500, text="failed")
+    return web.json_response({"applied": key})
+
+
+def create_webhook_app():
+    app = web.Application()
+    app.router.add_post(settings.jira_webhook_path, handle_webhook)
+    return app
+
+
+async def start_webhook_server():
+    """
+    Serve the webhook endpoint inside the bot's event loop.
+    :return: The aiohttp runner (call runner.cleanup() on shutdown), or None when no secret is configured.
+    """
+    if not settings.jira_webhook_secret:
+        logging.info("Jira webhook disabled: jira_webhook_secret is not set")
+        return None
+    runner = web.AppRunner(create_webhook_app())
+    await runner.setup()
+    await web.TCPSite(runner, settings.jira_webhook_host, settings.jira_webhook_port).start()
+    logging.info(f"Jira webhook listening on {settings.jira_webhook_host}:{settings.jira_webhook_port}{settings.jira_webhook_path}")
+    return runner
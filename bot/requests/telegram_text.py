@@ -0,0 +1,41 @@
+# Telegram rejects messages longer than this.
+MESSAGE_LIMIT = 4096
+
+
+def stream_chunks(pieces, limit: int = MESSAGE_LIMIT):
+    """
+    Re-cut a stream of text pieces into messages of at most `limit` characters, on line boundaries.
+    Each message is yielded as soon as it is full, so sending can start before rendering ends.
+    Lines longer than `limit` are cut; blank messages are skipped.
+    """
+    current, pending = "", ""
+    for piece in pieces:
+        pending += piece
+        if "\n" not in pending:
+            continue
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            line += "\n"
+            if len(current) + len(line) > limit:
+                if current.strip():
+                    yield current
+                current = ""
+                while len(line) > limit:
+                    yield line[:limit]
+                    line = line[limit:]
+            current += line
+
+    current += pending
+    while len(current) > limit:
+        yield current[:limit]
+        current = current[limit:]
+    if current.strip():
+        yield current
+
+
+def split_message(text: str, limit: int = MESSAGE_LIMIT):
+    """
+    Split text on line boundaries into pieces Telegram accepts.
+    :return: List of messages.
+    """
+    return list(stream_chunks([text], limit))
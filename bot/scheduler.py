@@ -0,0 +1,59 @@
+import asyncio
+import datetime
+import logging
+from zoneinfo import ZoneInfo
+
+
+class Scheduler:
+    """
+    Runs periodic coroutine jobs inside the bot's event loop.
+    """
+
+    def __init__(self):
+        self._jobs = []
+        self._tasks = []
+
+    def every(self, seconds: float, job, name: str = None):
+        """
+        Run `job()` now and then every `seconds` seconds.
+        """
+        self._jobs.append((name or job.__name__, self._run_every(seconds, job, name or job.__name__)))
+
+    def daily(self, at: datetime.time, job, timezone: str = "UTC", name: str = None):
+        """
+        Run `job()` once a day at the given wall-clock time in `timezone`.
+        """
+        self._jobs.append((name or job.__name__, self._run_daily(at, ZoneInfo(timezone), job, name or job.__name__)))
+
+    def start(self):
+        for name, coroutine in self._jobs:
+            self._tasks.append(asyncio.create_task(coroutine, name=name))
+        self._jobs = []
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    @staticmethod
+    async def _run_once(job, name):
+        try:
+            result = await job()
+            logging.info(f"Scheduled job {name} finished: {result}")
+        except Exception as e:
+            logging.error(f"Scheduled job {name} failed: {e}")
+
+    async def _run_every(self, seconds, job, name):
+        while True:
+            await self._run_once(job, name)
+            await asyncio.sleep(seconds)
+
+    async def _run_daily(self, at, timezone, job, name):
+        while True:
+            now = datetime.datetime.now(timezone)
+            next_run = datetime.datetime.combine(now.date(), at, timezone)
+            if next_run <= now:
+                next_run += datetime.timedelta(days=1)
+            await asyncio.sleep((next_run - now).total_seconds())
+            await self._run_once(job, name)
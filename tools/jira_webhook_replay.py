@@ -0,0 +1,70 @@
+"""
+Replay recorded Jira webhook payloads against the bot's webhook endpoint.
+
+Stands in for Jira when testing the receiver locally. Start the bot with jira_webhook_secret
+set, then run from the repository root:
+    python tools/jira_webhook_replay.py --secret <jira_webhook_secret>
+
+Payloads are sent in file-name order and signed like Jira does (X-Hub-Signature: sha256=...).
+Use --unsigned to pass the secret as a query parameter instead, or --bad-signature to check
+that tampered requests are rejected.
+
+WARNING: only point this at a bot running against a local or test database. The payloads
+create, update and delete a made-up issue FA-900, and the bot applies them to its Jira mirror
+like real events.
+"""
+import argparse
+import asyncio
+import glob
+import os
+import sys
+import aiohttp
+
+# Run as a script from tools/, so make the bot package importable.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bot.requests.jira_webhook import sign  # noqa: E402
+
+
+PAYLOADS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "jira_webhook_payloads")
+
+
+async def replay(url: str, secret: str, files: list, unsigned: bool = False, bad_signature: bool = False):
+    """
+    POST each payload file to `url`.
+    :return: Number of payloads the endpoint accepted.
+    """
+    accepted = 0
+    async with aiohttp.ClientSession() as session:
+        for path in files:
+            with open(path, "rb") as f:
+                body = f.read()
+            headers = {"Content-Type": "application/json"}
+            params = {}
+            if unsigned:
+                params["secret"] = secret
+            else:
+                headers["X-Hub-Signature"] = sign(body, "wrong" + secret if bad_signature else secret)
+
+            async with session.post(url, data=body, headers=headers, params=params) as response:
+                text = await response.text()
+                print(f"{os.path.basename(path)}: {response.status} {text}")
+                accepted += response.status == 200
+    return accepted
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8080/jira/webhook")
+    parser.add_argument("--secret", required=True)
+    parser.add_argument("--payloads", default=PAYLOADS, help="Directory of recorded *.json payloads")
+    parser.add_argument("--unsigned", action="store_true", help="Send the secret as ?secret= instead of signing")
+    parser.add_argument("--bad-signature", action="store_true", help="Sign with the wrong secret")
+    args = parser.parse_args()
+
+    files = sorted(glob.glob(os.path.join(args.payloads, "*.json")))
+    accepted = asyncio.run(replay(args.url, args.secret, files, args.unsigned, args.bad_signature))
+    print(f"{accepted}/{len(files)} payloads accepted")
+
+
+if __name__ == "__main__":
+    main()